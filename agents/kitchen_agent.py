@@ -46,6 +46,7 @@ from tools.meal_plan_tools import (
     auto_plan,
     save_plan,
     cook_meal,
+    cook_meals,
 )
 
 TOOLS = [
@@ -73,6 +74,7 @@ TOOLS = [
     auto_plan,
     save_plan,
     cook_meal,
+    cook_meals,
 ]
 
 # Optional: sanity print + asserts so you immediately see if anything’s missing
@@ -281,6 +283,8 @@ G) Ordinal references to recent dishes
 H) Cooking & pantry deduction
 • To mark something cooked, call cook_meal with either:
   {{ "day": "...", "meal": "..." }}  OR  {{ "dish": "..." }}.
+• To mark several meals cooked at once, call cook_meals once with
+  {{ "meals": [ ...same entries as cook_meal... ] }} instead of repeated cook_meal calls.
 • Never modify pantry by any other means.
 
 I) Exporting a plan
@@ -305,6 +309,7 @@ K) Tool schemas (use EXACT keys; no extras)
 • get_shopping_list: {{}}
 • save_plan: {{ "file_name": "optional_name" }}
 • cook_meal: {{ "day": "...", "meal": "..." }} OR {{ "dish": "..." }}
+• cook_meals: {{ "meals": [{{ "day": "...", "meal": "..." }} | {{ "dish": "..." }}, ...] }}
 • set_constraints: {{"mode":"pantry-first-strict"|"freeform","allow_repeats":bool,"cuisine":str|null,"diet":"veg"|"eggtarian"|"non-veg"|null,"max_time":int|null,"sub_policy":"100%-coverage"}}
 • get_constraints: {{}}
 • auto_plan: {{"days":int,"meals":int|["Breakfast","Lunch","Dinner"],"continue":bool}}
@@ -12,6 +12,7 @@ from tools.meal_plan_tools import (
     memory as planner_memory,         # plan / shopping list / logs
     update_plan, cook_meal,
     get_shopping_list, save_plan,
+    _day_num,                         # "Day<n>" -> n, shared with auto_plan
 )
 # Ensure default constraints are present so the badge shows Pantry-first (strict)
 if "constraints" not in planner_memory.memories:
@@ -212,7 +213,7 @@ def label_user_turn(text: str) -> str:
     for pat, labeller in USER_PATTERNS:
         m = pat.search(s)
         if m: return labeller(m)
-    words = re.findall(r"[^\s]+", s)
+    words = s.split()
     return " ".join(words[:6]) + ("…" if len(words) > 6 else "")
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -286,14 +287,11 @@ with left:
         edit_mode = st.toggle("✏️ Edit mode", value=False, help="Turn on to type new dish names; Save to commit.")
 
         def _label_with_date(day_key: str) -> str:
-            try:
-                n = int(re.sub(r"\D", "", day_key) or "1")
-            except Exception:
-                n = 1
+            n = _day_num(day_key) or 1
             d = ss["start_date"] + datetime.timedelta(days=n-1)
             return f"{day_key} ({d.strftime('%a %d %b')})"
 
-        days_sorted = sorted(plan.keys(), key=lambda d: (int(re.sub(r"\D", "", d) or 0), d))
+        days_sorted = sorted(plan.keys(), key=lambda d: (_day_num(d), d))
         st.caption("Tip: Click a dish to preview it on the right. In Edit mode, type to change names, then Save.")
         # Build a grid for all days × meals
         pending_updates: List[Dict[str, str]] = []
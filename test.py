@@ -1,7 +1,13 @@
-from tools.meal_plan_tools import set_constraints, auto_plan, memory
+from tools.meal_plan_tools import set_constraints, auto_plan, cook_meals, memory, _calc_log_view
 
 print(set_constraints.invoke({"payload": {"mode": "pantry-first-strict"}}))
 print(auto_plan.invoke({"payload": {"days": 3, "meals": ["Lunch","Dinner"]}}))
 
 print("\nPlan snapshot:", memory.memories.get("plan"))
-print("\nCalc log (last 3):", memory.memories.get("calc_log", [])[-3:])
+print("\nCalc log (last 3):", _calc_log_view()[-3:])
+
+# Fenced JSON from the model parses like plain JSON (unknown dish: pantry untouched)
+fenced = '```json\n{"meals": [{"dish": "no such dish"}]}\n```'
+out = cook_meals.invoke({"payload": fenced})
+print("\nFenced cook_meals:", out)
+assert out == "Error: recipe 'no such dish' not found.", out
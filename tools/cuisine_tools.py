@@ -1,11 +1,17 @@
 """
 tools/cuisine_tools.py  –  CRUD + query helpers for recipes.json
 """
-import json, os, re, difflib
+import os, re, difflib
 from typing import List, Optional, Dict
 from dotenv import load_dotenv
 from langchain_core.tools import tool
 from tools.textnorm import canonical_key, canonicalize_many
+from tools.jsonio import loads as _json_loads
+
+try:  # optional C-accelerated fuzzy matching; difflib is the fallback
+    from rapidfuzz import fuzz as _rf_fuzz, process as _rf_process  # type: ignore
+except ImportError:
+    _rf_process = None
 
 
 load_dotenv()
@@ -15,54 +21,78 @@ DATA_PATH = os.path.abspath(os.path.join(DATA_DIR, "recipe.json"))
 os.makedirs(DATA_DIR, exist_ok=True)
 
 # ── low-level storage helpers ──────────────────────────────────────────────
+_CACHE: Dict = {"mtime": None, "recipes": []}
+_DERIVED: Dict[str, tuple] = {}
+
 def _load() -> List[Dict]:
-    if os.path.exists(DATA_PATH):
-        with open(DATA_PATH, encoding="utf-8") as f:
-            return json.load(f)  # let JSON errors raise
-    return []
+    """
+    Parsed recipe.json, cached at module scope and re-read only when the
+    file's mtime changes. The list is shared between callers: read-only.
+    """
+    try:
+        mtime = os.stat(DATA_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    if mtime != _CACHE["mtime"]:
+        with open(DATA_PATH, "rb") as f:
+            _CACHE["recipes"] = _json_loads(f.read())  # let JSON errors raise
+        _CACHE["mtime"] = mtime
+    return _CACHE["recipes"]
+
+def _derived(name: str, build):
+    """Cache build(recipes), recomputed whenever _load() returns a new snapshot."""
+    recipes = _load()
+    hit = _DERIVED.get(name)
+    if hit is None or hit[0] is not recipes:
+        hit = _DERIVED[name] = (recipes, build(recipes))
+    return hit[1]
 
 def _normalize(name: str) -> str:
     """Return the head noun for loose matching."""
     return name.lower().split()[-1]       # last word
 
+_DIET_ALIASES = {
+    # vegetarian
+    "veg": "veg",
+    "vegetarian": "veg",
+    "veggie": "veg",
+    # eggtarian / ovo-vegetarian
+    "eggtarian": "eggtarian",
+    "eggetarian": "eggtarian",
+    "ovo-vegetarian": "eggtarian",
+    "ovo": "eggtarian",
+    "egg": "eggtarian",
+    # non-vegetarian
+    "non-veg": "non-veg",
+    "nonveg": "non-veg",
+    "non-vegetarian": "non-veg",
+    "nonvegetarian": "non-veg",
+    "meat": "non-veg",
+}
+_DIET_ORDER = {"veg": 0, "eggtarian": 1, "non-veg": 2}
+_NONVEG_FIRST = {"non-veg": 0, "eggtarian": 1, "veg": 2}
+
 def _normalise_diet(label: str | None) -> str:
     """Map user/recipe diet labels to canonical codes: veg, eggtarian, non-veg."""
     if not label:
         return ""
     s = str(label).strip().lower()
     s = s.replace("_", "-").replace(" ", "-")
-    aliases = {
-        # vegetarian
-        "veg": "veg",
-        "vegetarian": "veg",
-        "veggie": "veg",
-        # eggtarian / ovo-vegetarian
-        "eggtarian": "eggtarian",
-        "eggetarian": "eggtarian",
-        "ovo-vegetarian": "eggtarian",
-        "ovo": "eggtarian",
-        "egg": "eggtarian",
-        # non-vegetarian
-        "non-veg": "non-veg",
-        "nonveg": "non-veg",
-        "non-vegetarian": "non-veg",
-        "nonvegetarian": "non-veg",
-        "meat": "non-veg",
-    }
-    return aliases.get(s, s)
+    return _DIET_ALIASES.get(s, s)
 
-def diet_ok(recipe_diet, wanted):
-    """Allow veg ⊂ eggtarian ⊂ non-veg (i.e., higher code is more permissive)."""
-    r = _normalise_diet(recipe_diet)
-    w = _normalise_diet(wanted)
-    order = {"veg": 0, "eggtarian": 1, "non-veg": 2}
+def _diet_allows(r: str, w: str) -> bool:
+    """diet_ok on already-normalised codes."""
     if not w:
         # No user filter -> all ok
         return True
-    if r not in order or w not in order:
+    if r not in _DIET_ORDER or w not in _DIET_ORDER:
         # Unknown labels: fall back to exact-match to be safe
         return r == w
-    return order[r] <= order[w]
+    return _DIET_ORDER[r] <= _DIET_ORDER[w]
+
+def diet_ok(recipe_diet, wanted):
+    """Allow veg ⊂ eggtarian ⊂ non-veg (i.e., higher code is more permissive)."""
+    return _diet_allows(_normalise_diet(recipe_diet), _normalise_diet(wanted))
 
 _plural_re = re.compile(r"([^aeiou]y|[sxz]|ch|sh)$", re.I)
 def _plural(word: str) -> str:
@@ -75,6 +105,9 @@ def _fmt_ing(item: str, qty: int | float, unit: str) -> str:
         return f"- {qty} {name}"
     return f"- {qty} {unit} {item}"
 
+_WS_RE = re.compile(r"\s+")
+_ITEM_SPLIT_RE = re.compile(r"[,;\n]")
+
 def _clean_name(s: str) -> str:
     s = str(s or "").strip()
     # strip outer matching quotes
@@ -82,66 +115,65 @@ def _clean_name(s: str) -> str:
         s = s[1:-1]
     # strip any stray leading/trailing quotes and collapse spaces
     s = s.strip('\'"')
-    s = re.sub(r"\s+", " ", s)
+    s = _WS_RE.sub(" ", s)
     return s
 
 def _match(a: str, b: str) -> bool:
     return _clean_name(a).lower() == _clean_name(b).lower()
 
+def _name_key(s: str) -> str:
+    """Lookup key for recipe names: cleaned, stripped, lower-cased."""
+    return _clean_name(s).strip().lower()
+
+def _build_name_map(recipes: List[Dict]) -> Dict[str, Dict]:
+    """
+    _name_key(name) -> recipe (first wins, as the old linear scan did). The one
+    name index shared by cuisine/meal_plan/manager tools via _derived("by_name").
+    """
+    by_name: Dict[str, Dict] = {}
+    for r in recipes:
+        by_name.setdefault(_name_key(r["name"]), r)
+    return by_name
+
 def _find(name: str) -> Optional[Dict]:
     """Exact match first; if not found, fuzzy fallback for common typos."""
     want = _clean_name(name)
-    db = _load()
-    for r in db:
-        if _match(r["name"], want):
-            return r
+    by_name = _derived("by_name", _build_name_map)
+    r = by_name.get(_name_key(want))
+    if r is not None:
+        return r
     # fuzzy fallback (handles e.g. "palak pannerr", "kungpao chicken")
-    names = [r["name"] for r in db]
+    names = _derived("names", lambda rs: [r["name"] for r in rs])
+    if _rf_process is not None:
+        # rapidfuzz only narrows the field: its Indel ratio is never below
+        # difflib's ratio (matching blocks <= LCS), so every name difflib would
+        # accept survives, and difflib still picks among them -> same result
+        # with or without rapidfuzz installed
+        names = [n for n, _, _ in _rf_process.extract(
+            want, names, scorer=_rf_fuzz.ratio, processor=None, score_cutoff=85, limit=None)]
     hit = difflib.get_close_matches(want, names, n=1, cutoff=0.85)
     if hit:
-        return next((r for r in db if _match(r["name"], hit[0])), None)
+        return by_name.get(_name_key(hit[0]))
     return None
 
 def _coerce_payload(payload):
     if isinstance(payload, dict):
         return payload
     s = str(payload or "").strip()
-    import json
-    try:
-        return json.loads(s)
-    except Exception:
-        # salvage the first {...}
-        start, end = s.find("{"), s.rfind("}") + 1
-        if start >= 0 and end > start:
-            cand = s[start:end]
-            if '"' not in cand and "'" in cand:
-                cand = cand.replace("'", '"')
-            return json.loads(cand)
-        raise ValueError(f"Invalid JSON payload: {s[:120]}...")
-
-# ── name canonicalization for coverage checks ─────────────────────────────
-def _canon(name: str) -> str:
-    """
-    Canonicalize an ingredient/pantry token to a base form:
-    - import canonical_item_name lazily to avoid circular imports,
-    - lowercase,
-    - very simple singularization (tomatoes -> tomato).
-    """
-    # Lazy import to break the cycle with manager_tools
-    try:
-        from tools.manager_tools import canonical_item_name as _canon_name
-    except Exception:
-        # Safe fallback if manager_tools isn't available yet
-        def _canon_name(x: str) -> str:
-            return (x or "").strip().lower()
-
-    base = _canon_name(name) if name else ""
-    s = (base or "").strip().lower()
-    if s.endswith("ies"):
-        s = s[:-3] + "y"
-    elif s.endswith("s") and len(s) > 3:
-        s = s[:-1]
-    return s
+    # only attempt a straight parse when it looks like an object
+    if s.startswith("{") and s.endswith("}"):
+        try:
+            return _json_loads(s)
+        except ValueError:
+            pass
+    # salvage the first {...}
+    start, end = s.find("{"), s.rfind("}") + 1
+    if start >= 0 and end > start:
+        cand = s[start:end]
+        if '"' not in cand and "'" in cand:
+            cand = cand.replace("'", '"')
+        return _json_loads(cand)
+    raise ValueError(f"Invalid JSON payload: {s[:120]}...")
 
 # ── LangChain tools ────────────────────────────────────────────────────────
 @tool
@@ -179,6 +211,30 @@ def list_recipes(cuisine: Optional[str] = None,
 def _canon(s: str) -> str:
     return canonical_key(s)
 
+# ── ingredient index for find_recipes_by_items (rebuilt when the file changes)
+def _build_index(recipes: List[Dict]) -> Dict:
+    """
+    Per recipe: its canonical ingredient set and its (lowercased cuisine,
+    normalised diet) pair, plus an inverted canonical item -> [recipe ids]
+    map. Canonicalizing every ingredient is the expensive part, so this is
+    built once per version of recipe.json (see _derived).
+    """
+    needs: Dict[int, set] = {}
+    by_item: Dict[str, List[int]] = {}
+    meta: Dict[int, tuple] = {}
+    for r in recipes:
+        meta[id(r)] = (r.get("cuisine", "").lower(), _normalise_diet(r.get("diet")))
+        need_set = {
+            canonical_key(i.get("item", ""))
+            for i in (r.get("ingredients") or [])
+            if (i.get("item") or "").strip()
+        }
+        need_set.discard("")
+        needs[id(r)] = need_set
+        for c in need_set:
+            by_item.setdefault(c, []).append(id(r))
+    return {"recipes": recipes, "needs": needs, "by_item": by_item, "meta": meta}
+
 @tool
 def find_recipes_by_items(payload: dict | str) -> str:
     """
@@ -201,7 +257,7 @@ def find_recipes_by_items(payload: dict | str) -> str:
     if isinstance(items, str):
         s = items.strip()
         try:
-            data = json.loads(s) if (s.startswith("{") and s.endswith("}")) else {}
+            data = _json_loads(s) if (s.startswith("{") and s.endswith("}")) else {}
         except Exception:
             data = {}
         if isinstance(data, dict):
@@ -211,16 +267,20 @@ def find_recipes_by_items(payload: dict | str) -> str:
             diet    = data.get("diet", diet)
             k       = data.get("k", k)
         else:
-            items = [w.strip() for w in re.split(r"[,;\n]", s) if w.strip()]
+            items = [w.strip() for w in _ITEM_SPLIT_RE.split(s) if w.strip()]
 
     items = [s.strip() for s in (items or []) if s and s.strip()]
 
     # ---- load & filter candidates
-    recipes = _load()
+    index = _derived("index", _build_index)
+    recipes = index["recipes"]
+    meta = index["meta"]
+    want_diet = _normalise_diet(diet)
     if diet:
-        recipes = [r for r in recipes if diet_ok(r.get("diet"), diet)]
+        recipes = [r for r in recipes if _diet_allows(meta[id(r)][1], want_diet)]
     if cuisine:
-        recipes = [r for r in recipes if r.get("cuisine", "").lower() == cuisine.lower()]
+        want_cuisine = cuisine.lower()
+        recipes = [r for r in recipes if meta[id(r)][0] == want_cuisine]
     if max_time is not None:
         recipes = [
             r for r in recipes
@@ -240,24 +300,31 @@ def find_recipes_by_items(payload: dict | str) -> str:
 
     # ---------- Canonicalize and rank ----------
     have_set = set(canonicalize_many(items))  # spaCy primary → inflect fallback
-    ranked = []  # (is_full_cover: bool, covered_count: int, total_time: int, recipe: dict, coverage_ratio: float)
-
-    for r in recipes:
-        need_set = {
-            canonical_key(i.get("item", ""))
-            for i in (r.get("ingredients") or [])
-            if (i.get("item") or "").strip()
-        }
-        need_set.discard("")
-        total_need = len(need_set)
-        if total_need == 0:
-            continue
-
-        covered_cnt = len(need_set & have_set)
-        is_full = (covered_cnt == total_need)
-        total_time = int(r.get("prep_time_min", 0)) + int(r.get("cook_time_min", 0))
-        ratio = covered_cnt / total_need
-        ranked.append((is_full, covered_cnt, total_time, r, ratio))
+    needs = index["needs"]
+
+    def _rank(pool: List[Dict]) -> list:
+        ranked = []  # (is_full_cover: bool, covered_count: int, total_time: int, recipe: dict, coverage_ratio: float)
+        for r in pool:
+            need_set = needs[id(r)]
+            total_need = len(need_set)
+            if total_need == 0:
+                continue
+
+            covered_cnt = len(need_set & have_set)
+            is_full = (covered_cnt == total_need)
+            total_time = int(r.get("prep_time_min", 0)) + int(r.get("cook_time_min", 0))
+            ratio = covered_cnt / total_need
+            ranked.append((is_full, covered_cnt, total_time, r, ratio))
+        return ranked
+
+    # Only recipes sharing at least one item can be fully covered; score those first.
+    hits = set()
+    for c in have_set:
+        hits.update(index["by_item"].get(c, ()))
+    ranked = _rank([r for r in recipes if id(r) in hits])
+    if not any(t[0] for t in ranked):
+        # No full cover: the partial ranking considers every filtered recipe.
+        ranked = _rank(recipes)
 
     if not ranked:
         return "📭 No recipes match those items."
@@ -266,20 +333,17 @@ def find_recipes_by_items(payload: dict | str) -> str:
     ranked.sort(key=lambda t: (not t[0], -t[1], t[2], (t[3].get("name") or "").lower()))
 
     # Optional bias by requested diet (only meaningful for "non-veg" preference)
-    def _diet_rank(recipe_diet: str, user_want: Optional[str]) -> int:
-        want = _normalise_diet(user_want)
-        r    = _normalise_diet(recipe_diet)
-        if want == "non-veg":
-            order = {"non-veg": 0, "eggtarian": 1, "veg": 2}
-            return order.get(r, 3)
+    def _diet_rank(recipe: Dict) -> int:
+        if want_diet == "non-veg":
+            return _NONVEG_FIRST.get(meta[id(recipe)][1], 3)
         return 0
 
     full = [t for t in ranked if t[0]]
     partial = [t for t in ranked if not t[0]]
 
     if diet:
-        full.sort(key=lambda t: (_diet_rank(t[3].get("diet", ""), diet), t[2], (t[3].get("name") or "").lower()))
-        partial.sort(key=lambda t: (_diet_rank(t[3].get("diet", ""), diet), -t[1], t[2], (t[3].get("name") or "").lower()))
+        full.sort(key=lambda t: (_diet_rank(t[3]), t[2], (t[3].get("name") or "").lower()))
+        partial.sort(key=lambda t: (_diet_rank(t[3]), -t[1], t[2], (t[3].get("name") or "").lower()))
 
     bucket = full if full else partial
     top = bucket[:k]
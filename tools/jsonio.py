@@ -0,0 +1,113 @@
+"""
+tools/jsonio.py – tiny JSON shim shared by the tools.
+
+Uses orjson when it is installed (noticeably faster on the hot payload and
+file paths) and falls back to the stdlib json module otherwise.
+"""
+import json
+import os
+import tempfile
+from typing import Optional
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+
+def loads(s):
+    """Parse a JSON document from str/bytes. Raises ValueError on bad input."""
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+def _first_object(s: str) -> Optional[str]:
+    """First balanced {...} block in *s* (quote/escape aware), or None."""
+    start = s.find("{")
+    if start < 0:
+        return None
+    depth, in_str, esc = 0, False, False
+    for i in range(start, len(s)):
+        ch = s[i]
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return s[start:i + 1]
+    return None
+
+
+def parse_llm_json(text) -> Optional[dict]:
+    """
+    Best-effort parse of an object handed to a tool by the LLM.
+
+    Dicts pass through. Strings get a direct parse first; failing that, the
+    first balanced {...} block is extracted (drops ```json fences and any
+    prose around it) and parsed, finally with strict=False so raw newlines
+    inside strings are tolerated. Returns None if no object can be recovered.
+    """
+    if isinstance(text, dict):
+        return text
+    s = str(text or "").strip()
+    if not s:
+        return None
+    try:
+        obj = loads(s)
+    except ValueError:
+        block = _first_object(s)
+        if block is None:
+            return None
+        try:
+            obj = loads(block)
+        except ValueError:
+            try:
+                obj = json.loads(block, strict=False)
+            except ValueError:
+                return None
+    return obj if isinstance(obj, dict) else None
+
+
+def dumps_pretty(obj) -> bytes:
+    """2-space indented JSON as UTF-8 bytes (non-ASCII kept as-is)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def write_json_atomic(path, obj, *, blob: Optional[bytes] = None) -> None:
+    """
+    Write *obj* as pretty JSON to *path* without ever leaving a half-written
+    file behind: serialise to a uniquely named sibling temp file, then
+    os.replace() it.
+    Pass *blob* when the caller already holds dumps_pretty(obj).
+    """
+    data = blob if blob is not None else dumps_pretty(obj)
+    # unique temp name in the target dir, so two writers never share one
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".",
+                               suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(tmp, mode)  # mkstemp files are 0600; keep the usual permissions
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
@@ -5,8 +5,11 @@ missing_ingredients tool. No agent-to-agent wrappers are used anymore.
 
 from __future__ import annotations
 import json, os, re
+from functools import lru_cache
 from typing import Dict, Any, List, Tuple, Optional
 from tools.textnorm import canonical_key, canonical_and_unit
+from tools.jsonio import loads as _json_loads
+from tools.cuisine_tools import _derived as _recipes_derived, _build_name_map, _name_key
 
 
 from langchain_core.tools import tool
@@ -21,47 +24,49 @@ PANTRY_JSON_PATH = os.path.join(ROOT_DIR, "data", "pantry.json")
 
 # ----------------------------------------------------------------- Helpers
 
-_name_unit_re = re.compile(r"^\s*(.*?)\s*\(([^)]+)\)\s*$")
-
 def _split_pantry_key(key: str) -> Tuple[str, str]:
     """'tomato (count)' -> ('tomato', 'count')  |  'rice (g)' -> ('rice','g')"""
-    m = _name_unit_re.match(key)
-    if not m:
-        base = key.split("(")[0]
-        return base.strip().lower(), "count"
-    return m.group(1).strip().lower(), m.group(2).strip().lower()
+    # str.find parse: the unit is the trailing "(...)" group with no ')' inside
+    t = key.rstrip()
+    if t.endswith(")"):
+        j = len(t) - 1
+        i = t.find("(", t.rfind(")", 0, j) + 1)
+        if 0 <= i < j - 1:
+            return t[:i].strip(), _normalize_unit(t[i + 1:j])
+    return key.split("(")[0].strip(), "count"
+
+_UNIT_ALIASES = {
+    "g":"g","gram":"g","grams":"g","gms":"g","kg":"g","kilogram":"g","kilograms":"g",
+    "ml":"ml","milliliter":"ml","milliliters":"ml","millilitre":"ml","millilitres":"ml",
+    "l":"ml","liter":"ml","liters":"ml","litre":"ml","litres":"ml",
+    "count":"count","piece":"count","pieces":"count","pc":"count","pcs":"count"
+}
 
 def _normalize_unit(u: Optional[str]) -> str:
-    if not u:
-        return "count"
-    u = u.strip().lower()
-    if u in ("kg", "kilogram", "kilograms"):
-        return "g"
-    if u in ("g", "gram", "grams", "gms"):
-        return "g"
-    if u in ("l", "litre", "liter", "liters", "litres"):
-        return "ml"
-    if u in ("ml", "millilitre", "milliliter", "milliliters", "millilitres"):
-        return "ml"
-    if u in ("count", "pcs", "piece", "pieces"):
-        return "count"
-    return u  # leave as-is for any custom units
+    if not u: return "count"
+    s = str(u).strip().lower()
+    return _UNIT_ALIASES.get(s, s)
+
+# Plural folds as (suffix, replacement, min_len); first match wins.
+_SUFFIX_RULES = (("ies", "y", 3), ("s", "", 4))
+
+def _depluralize(w: str) -> str:
+    for suf, rep, mn in _SUFFIX_RULES:
+        if len(w) >= mn and w.endswith(suf):
+            return w[:-len(suf)] + rep
+    return w
 
+@lru_cache(maxsize=4096)
 def _normalise(name: str) -> str:
     """Lower-case and strip very simple plurals (onions → onion)."""
-    n = name.strip().lower()
-    if n.endswith("ies"):
-        n = n[:-3] + "y"
-    elif n.endswith("s") and len(n) > 3:
-        n = n[:-1]
-    return n
+    return _depluralize(name.strip().lower())
 
 # Generic descriptors we drop for base-name matching (kept intentionally short)
-_DESCRIPTORS = {
+_DESCRIPTORS = frozenset({
     "white", "boneless", "skinless", "lean", "fresh", "frozen", "dried",
     "ground", "powdered", "powder", "whole", "sliced", "chopped", "fillet", "fillets",
     "medium", "large", "small","red", "green", "yellow", "black", "brown",
-}
+})
 
 # A *tiny* alias map (not a big dictionary) to collapse very common variants
 _ALIASES = {
@@ -72,27 +77,22 @@ _ALIASES = {
     "curry leaves": "curry leaf",
 }
 
-_plural_re = re.compile(r"(?i)(ies|s)$")
-
-def _depluralize(w: str) -> str:
-    if w.endswith("ies"):
-        return w[:-3] + "y"
-    if w.endswith("s") and len(w) > 3:
-        return w[:-1]
-    return w
+# compiled once, longest alias first so multiword aliases win
+_ALIAS_PATTERNS = [
+    (re.compile(rf"\b{re.escape(k)}\b"), v)
+    for k, v in sorted(_ALIASES.items(), key=lambda kv: -len(kv[0]))
+]
 
 # ---------------------- Recipe access (structured, no agent hop)
-from tools.cuisine_tools import _load as _load_recipes
 
 def _load_recipe_by_name(name: str) -> Optional[Dict[str, Any]]:
-    name = _clean_name(name)
-    name_l = name.strip().lower()
-    for r in _load_recipes():
-        if r["name"].strip().lower() == name_l:
-            return r
-    return None
+    # cuisine_tools' shared name index, rebuilt only when recipe.json reloads
+    return _recipes_derived("by_name", _build_name_map).get(_name_key(name))
 
 # ----------------------------------------------------------------- Tool: gaps
+_WS_RE = re.compile(r"\s+")
+_NONWORD_RE = re.compile(r"\W+")
+
 def _clean_name(s: str) -> str:
     s = str(s or "").strip()
     # strip balanced outer quotes
@@ -100,18 +100,19 @@ def _clean_name(s: str) -> str:
         s = s[1:-1]
     # strip any stray quotes/whitespace and collapse spaces
     s = s.strip('\'"\n\r\t ')
-    s = re.sub(r"\s+", " ", s)
+    s = _WS_RE.sub(" ", s)
     return s
 
 
+@lru_cache(maxsize=4096)
 def _canonical_item_name(name: str) -> str:
     """Lowercase, drop generic descriptors, collapse trivial aliases, depluralize."""
     s = _clean_name(name).lower()
     # collapse multiword aliases first
-    for k, v in sorted(_ALIASES.items(), key=lambda kv: -len(kv[0])):
-        s = re.sub(rf"\b{k}\b", v, s)
+    for pat, v in _ALIAS_PATTERNS:
+        s = pat.sub(v, s)
     # drop descriptors
-    tokens = [t for t in re.split(r"\W+", s) if t]
+    tokens = [t for t in _NONWORD_RE.split(s) if t]
     tokens = [t for t in tokens if t not in _DESCRIPTORS]
     # depluralize each token (lightweight)
     tokens = [_depluralize(t) for t in tokens]
@@ -131,8 +132,8 @@ def canonical_item_name(name: str) -> str:
 # ------------------------------- Pantry IO ----------------------------------
 def _load_pantry() -> Dict[str, int]:
     try:
-        with open(PANTRY_JSON_PATH, "r", encoding="utf-8") as fp:
-            data = json.load(fp)
+        with open(PANTRY_JSON_PATH, "rb") as fp:
+            data = _json_loads(fp.read())
             return {k: int(v) for (k, v) in data.items()}
     except FileNotFoundError:
         return {}
@@ -140,27 +141,28 @@ def _load_pantry() -> Dict[str, int]:
         return {}
 
 
-from tools.textnorm import canonical_key
 # ----------------------------- Tools ----------------------------------------
-_name_unit_re = re.compile(r"^\s*(.*?)\s*\(([^)]+)\)\s*$")
+_PANTRY_MAP_CACHE: Dict[str, Any] = {"mtime": None, "map": {}}
+
+def _canonical_pantry_map() -> Dict[Tuple[str, str], int]:
+    """
+    Canonical pantry map: (canon_name, unit) -> qty. Canonicalizing every
+    pantry key is the costly part, so the map is reused until pantry.json
+    changes on disk.
+    """
+    try:
+        mtime = os.stat(PANTRY_JSON_PATH).st_mtime_ns
+    except OSError:
+        mtime = None
+    if mtime is None or mtime != _PANTRY_MAP_CACHE["mtime"]:
+        pantry_map: Dict[Tuple[str, str], int] = {}
+        for k, v in _load_pantry().items():
+            base_raw, unit_raw = _split_pantry_key(k)
+            cname, cunit = canonical_and_unit(base_raw, unit_raw)
+            pantry_map[(cname, cunit)] = pantry_map.get((cname, cunit), 0) + int(v or 0)
+        _PANTRY_MAP_CACHE.update(mtime=mtime, map=pantry_map)
+    return _PANTRY_MAP_CACHE["map"]
 
-def _normalize_unit(u: str | None) -> str:
-    if not u: return "count"
-    s = str(u).strip().lower()
-    m = {
-        "g":"g","gram":"g","grams":"g","gms":"g","kg":"g","kilogram":"g","kilograms":"g",
-        "ml":"ml","milliliter":"ml","milliliters":"ml","millilitre":"ml","millilitres":"ml",
-        "l":"ml","liter":"ml","liters":"ml","litre":"ml","litres":"ml",
-        "count":"count","piece":"count","pieces":"count","pc":"count","pcs":"count"
-    }
-    return m.get(s, s)
-
-def _split_pantry_key(key: str) -> tuple[str, str]:
-    m = _name_unit_re.match(key)
-    if not m:
-        base = key.split("(")[0]
-        return base.strip(), "count"
-    return m.group(1).strip(), _normalize_unit(m.group(2))
 @tool
 def missing_ingredients(dish: str) -> str:
     """
@@ -180,13 +182,7 @@ def missing_ingredients(dish: str) -> str:
     if not recipe:
         return f"⚠️ Recipe '{dish}' not found."
 
-    # Build a canonical pantry map: (canon_name, unit) -> qty
-    pantry_raw = _load_pantry()
-    pantry_map: dict[tuple[str, str], int] = {}
-    for k, v in pantry_raw.items():
-        base_raw, unit_raw = _split_pantry_key(k)
-        cname, cunit = canonical_and_unit(base_raw, unit_raw)
-        pantry_map[(cname, cunit)] = pantry_map.get((cname, cunit), 0) + int(v or 0)
+    pantry_map = _canonical_pantry_map()
 
     deficits: list[str] = []
     for ing in recipe.get("ingredients", []):
@@ -219,14 +215,17 @@ def _coerce_payload(payload: dict | str) -> dict:
     if isinstance(payload, dict):
         return payload
     s = str(payload or "").strip()
-    try:
-        return json.loads(s)
-    except Exception:
-        # salvage the first {...}
-        a, b = s.find("{"), s.rfind("}") + 1
-        if a >= 0 and b > a:
-            return json.loads(s[a:b])
-        raise ValueError("Invalid JSON payload for suggest_substitutions")
+    # only attempt a straight parse when it looks like an object
+    if s.startswith("{") and s.endswith("}"):
+        try:
+            return _json_loads(s)
+        except ValueError:
+            pass
+    # salvage the first {...}
+    a, b = s.find("{"), s.rfind("}") + 1
+    if a >= 0 and b > a:
+        return _json_loads(s[a:b])
+    raise ValueError("Invalid JSON payload for suggest_substitutions")
 
 def _aggregate_pantry_by_base(pantry: Dict[str, int]) -> Dict[str, Dict[str, int]]:
     """
@@ -284,16 +283,16 @@ def suggest_substitutions(payload: dict | str) -> str:
     allow_prep = bool((data.get("constraints") or {}).get("allow_prep", True))
 
     # Build a base-name index for the pantry
-    # Prefer the snapshot passed in; fall back to file.
+    # Prefer the snapshot passed in (already structured, index it directly);
+    # fall back to file.
     if pantry_list:
-        pantry: Dict[str, int] = {}
+        pantry_by_base: Dict[str, Dict[str, int]] = {}
         for p in pantry_list:
-            k = f"{_canonical_item_name(p.get('item',''))} ({_normalize_unit(p.get('unit'))})"
-            pantry[k] = pantry.get(k, 0) + int(p.get("qty", 0))
+            units = pantry_by_base.setdefault(_canonical_item_name(p.get("item", "")), {})
+            u = _normalize_unit(p.get("unit"))
+            units[u] = units.get(u, 0) + int(p.get("qty", 0))
     else:
-        pantry = _load_pantry()
-
-    pantry_by_base = _aggregate_pantry_by_base(pantry)
+        pantry_by_base = _aggregate_pantry_by_base(_load_pantry())
 
     results: List[Dict[str, Any]] = []
 
@@ -1,23 +1,24 @@
 from __future__ import annotations
-import json, os, datetime, re
+import json, os, datetime, hashlib
+from collections import Counter
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, Any, List, Tuple, Optional
 
 from langchain_core.tools import tool
 from langchain.memory import SimpleMemory
-from tools.cuisine_tools import _load as _load_recipes
+from tools.cuisine_tools import _load as _load_recipes, _derived as _recipes_derived, _find as _find_recipe
+from tools.cuisine_tools import _build_name_map, _name_key
 from tools.textnorm import canonical_key as _canon, canonical_and_unit as _canon_and_unit
+from tools.jsonio import loads as _json_loads, dumps_pretty, parse_llm_json, write_json_atomic
+from tools import pantry_tools as _pt
 
+# pantry_tools normalisers, bound once for the cook_meal loops
+_canon_item = _pt._canon_item
+_norm_unit  = _pt._norm_unit
 
 
-# -----------------------------------------------------------------------------
-# Optional legacy import: call_pantry (no-op stub if not present)
-# -----------------------------------------------------------------------------
-try:
-    from tools.manager_tools import call_pantry as _mgr_call_pantry  # legacy refresh
-except Exception:
-    def _mgr_call_pantry(_: str) -> str:
-        return ""
 
 ##############################################################################
 # Shared memory object – survives for the life of the Streamlit session
@@ -32,18 +33,21 @@ os.makedirs(PLAN_DIR, exist_ok=True)
 ##############################################################################
 # Prefer KitchenAgent; fallback to ManagerAgent if present
 ##############################################################################
-_kitchen_chat = None
-_manager_agent_chat = None
-try:
-    from agents.kitchen_agent import chat as _kitchen_chat  # preferred
-except Exception:
-    _kitchen_chat = None
+_ROUTER: Dict[str, Any] = {}
 
-try:
-    from agents import manager_agent as _manager_agent_mod  # legacy fallback
-    _manager_agent_chat = _manager_agent_mod.chat
-except Exception:
-    _manager_agent_chat = None
+def _routing_chat():
+    """Import the routing agent's chat() on first use (agents are heavy, and
+    kitchen_agent imports this module, so importing it eagerly is circular)."""
+    if "chat" not in _ROUTER:
+        try:
+            from agents.kitchen_agent import chat  # preferred
+        except Exception:
+            try:
+                from agents.manager_agent import chat  # legacy fallback
+            except Exception:
+                chat = None
+        _ROUTER["chat"] = chat
+    return _ROUTER["chat"]
 
 # Default planning mode if not set by UI
 DEFAULT_MODE = "pantry-first"   # or "user-choice"
@@ -52,7 +56,7 @@ def _get_mode() -> str:
     return (memory.memories.get("mode") or DEFAULT_MODE).strip().lower()
 
 # ---------------- Constraints (single source of truth) ----------------
-DEFAULT_CONSTRAINTS = {
+DEFAULT_CONSTRAINTS = MappingProxyType({
     "mode": "pantry-first-strict",   # or "freeform"
     "allow_repeats": True,
     "cuisine": None,
@@ -60,14 +64,19 @@ DEFAULT_CONSTRAINTS = {
     "max_time": None,                # int minutes or None
     "sub_policy": "100%-coverage",   # label only; strict means exact coverage
     "allow_subs": False,             # when True we allow prep/subs to reach 100%
-}
+})
 
 
 def _get_constraints() -> Dict[str, Any]:
-    c = memory.memories.get("constraints") or {}
-    out = {**DEFAULT_CONSTRAINTS, **c}
-    memory.memories["constraints"] = out
-    return out
+    """The live constraints dict in memory (created from the defaults once)."""
+    c = memory.memories.get("constraints")
+    if not c:
+        c = memory.memories["constraints"] = dict(DEFAULT_CONSTRAINTS)
+    elif not c.keys() >= DEFAULT_CONSTRAINTS.keys():
+        # older/partial state: fill gaps in place
+        for k, v in DEFAULT_CONSTRAINTS.items():
+            c.setdefault(k, v)
+    return c
 
 def _normalize_constraints(upd: Dict[str, Any]) -> Dict[str, Any]:
     c = _get_constraints()
@@ -108,21 +117,19 @@ def get_constraints(_: str | None = None) -> str:
 @tool
 def set_constraints(payload: Dict[str, Any] | str) -> str:
     """Update planning constraints (mode, allow_repeats, cuisine, diet, max_time, sub_policy)."""
-    if isinstance(payload, str):
-        try:
-            payload = json.loads(payload)
-        except Exception:
-            # allow shorthand like "pantry-first" or "freeform"
-            p = (payload or "").strip().lower()
-            if p in ("pantry-first", "pantry-first-strict", "strict"):
-                payload = {"mode": "pantry-first-strict"}
-            elif p in ("freeform", "user-choice", "personal-choice"):
-                payload = {"mode": "freeform"}
-            else:
-                return "Error: set_constraints expects a JSON object or a known mode keyword."
-    if not isinstance(payload, dict):
-        return "Error: set_constraints expects an object."
-    c = _normalize_constraints(payload)
+    upd = parse_llm_json(payload)
+    if upd is None:
+        if not isinstance(payload, str):
+            return "Error: set_constraints expects an object."
+        # allow shorthand like "pantry-first" or "freeform"
+        p = payload.strip().lower()
+        if p in ("pantry-first", "pantry-first-strict", "strict"):
+            upd = {"mode": "pantry-first-strict"}
+        elif p in ("freeform", "user-choice", "personal-choice"):
+            upd = {"mode": "freeform"}
+        else:
+            return "Error: set_constraints expects a JSON object or a known mode keyword."
+    c = _normalize_constraints(upd)
     nice_mode = "Pantry-first (strict)" if c["mode"] == "pantry-first-strict" else "Freeform"
     return f"OK. Mode: {nice_mode}, repeats: {c['allow_repeats']}, cuisine: {c['cuisine'] or 'any'}, diet: {c['diet'] or 'any'}, max_time: {c['max_time'] or 'any'}."
 
@@ -180,47 +187,40 @@ def call_manager(query: Dict[str, Any] | str | None = None) -> str:
     Returns:
         Raw text reply (expected: one recipe name per line).
     """
-    if isinstance(query, str):
-        try:
-            payload: Dict[str, Any] = json.loads(query)
-        except Exception:
-            payload = {}
-    elif isinstance(query, dict):
-        payload = query
-    else:
-        payload = {}
+    payload: Dict[str, Any] = parse_llm_json(query) or {}
 
     prompt = _fmt_prompt(payload)
 
-    if _kitchen_chat is not None:
-        return _kitchen_chat(prompt)
-    if _manager_agent_chat is not None:
-        return _manager_agent_chat(prompt)
+    chat = _routing_chat()
+    if chat is not None:
+        return chat(prompt)
 
     return ("Error: no routing agent available (KitchenAgent/ManagerAgent not found). "
             "You can still use cuisine_tools.find_recipes_by_items directly.")
 
-from tools import pantry_tools as _pt  
-
-def _canon_name_unit(item: str, unit: str) -> tuple[str, str]:
-    return _canon_and_unit(item, unit)
-
-
-def _recipe_eligible_by_filters(rec: Dict[str, Any], c: Dict[str, Any]) -> bool:
-    # cuisine
-    if c.get("cuisine"):
-        if (rec.get("cuisine") or "").strip().lower() != c["cuisine"]:
-            return False
-    # diet
+def _make_filter(c: Dict[str, Any]):
+    """Return a recipe predicate closing over only the constraints that are set."""
+    cuisine = c.get("cuisine")
     want = c.get("diet")
-    if want and (rec.get("diet") or "").strip().lower() not in (want, "any", ""):
-        return False
-    # time
-    if c.get("max_time"):
-        total = int(rec.get("prep_time_min", 0)) + int(rec.get("cook_time_min", 0))
-        if total > int(c["max_time"]):
+    max_time = int(c["max_time"]) if c.get("max_time") else None
+    if not (cuisine or want or max_time is not None):
+        return lambda rec: True
+    diets = (want, "any", "")
+
+    def _ok(rec: Dict[str, Any]) -> bool:
+        # cuisine
+        if cuisine and (rec.get("cuisine") or "").strip().lower() != cuisine:
             return False
-    return True
+        # diet
+        if want and (rec.get("diet") or "").strip().lower() not in diets:
+            return False
+        # time
+        if max_time is not None:
+            total = int(rec.get("prep_time_min", 0)) + int(rec.get("cook_time_min", 0))
+            if total > max_time:
+                return False
+        return True
+    return _ok
 
 def _full_coverage_and_usage(rec: Dict[str, Any], shadow: Dict[str, int]) -> tuple[bool, List[str]]:
     """
@@ -228,13 +228,7 @@ def _full_coverage_and_usage(rec: Dict[str, Any], shadow: Dict[str, int]) -> tup
     with exact canonical (name,unit) key. usage_lines are human-readable like '200 g chicken'.
     """
     usage: List[str] = []
-    for ing in rec.get("ingredients", []):
-        item = (ing.get("item") or "").strip()
-        qty  = int(ing.get("quantity") or 0)
-        unit = _normalize_unit(ing.get("unit") or "count")
-        if not item or qty <= 0:
-            continue
-        name_c, unit_n = _canon_name_unit(item, unit)
+    for name_c, unit_n, qty in _recipe_requirements_canon(rec):
         key = f"{name_c} ({unit_n})"
         have = int(shadow.get(key, 0))
         if have < qty:
@@ -243,15 +237,8 @@ def _full_coverage_and_usage(rec: Dict[str, Any], shadow: Dict[str, int]) -> tup
     return True, usage
 
 def _can_fulfill_strict(rec: Dict[str, Any], shadow: Dict[str, int]) -> bool:
-    for ing in rec.get("ingredients", []):
-        item = (ing.get("item") or "").strip()
-        qty  = int(ing.get("quantity") or 0)
-        unit = _normalize_unit(ing.get("unit") or "count")
-        if not item or qty <= 0:
-            continue
-        name_c, unit_n = _canon_name_unit(item, unit)
-        key = f"{name_c} ({unit_n})"
-        if shadow.get(key, 0) < qty:
+    for name_c, unit_n, qty in _recipe_requirements_canon(rec):
+        if shadow.get(f"{name_c} ({unit_n})", 0) < qty:
             return False
     return True
 
@@ -260,20 +247,27 @@ def _apply_deduction(rec: Dict[str, Any], shadow: Dict[str, int]) -> None:
     Subtract each ingredient qty from the shadow pantry and return usage lines
     like '200 g chicken' for logging.
     """
-    for ing in rec.get("ingredients", []):
-        item = (ing.get("item") or "").strip()
-        qty  = int(ing.get("quantity") or 0)
-        unit = _normalize_unit(ing.get("unit") or "count")
-        if not item or qty <= 0:
-            continue
-        name_c, unit_n = _canon_name_unit(item, unit)
+    for name_c, unit_n, qty in _recipe_requirements_canon(rec):
         key = f"{name_c} ({unit_n})"
-        shadow[key] = max(0, int(shadow.get(key, 0)) - qty)
+        have = shadow.get(key, 0)
+        shadow[key] = have - qty if have > qty else 0
 
 
 
 def _eligible_recipes(c: Dict[str, Any]) -> List[Dict[str, Any]]:
-    return [r for r in _load_recipes() if _recipe_eligible_by_filters(r, c)]
+    """
+    Recipes passing the cuisine/diet/time filters, in deterministic name order.
+    Cached per filter tuple for the life of the recipe snapshot; treat as read-only.
+    """
+    memo = _recipes_derived("meal_plan.eligible", lambda _recipes: {})
+    key = (c.get("cuisine"), c.get("diet"), c.get("max_time"))
+    hit = memo.get(key)
+    if hit is None:
+        ok = _make_filter(c)
+        hit = [r for r in _load_recipes() if ok(r)]
+        hit.sort(key=lambda r: ((r.get("name") or "").lower(), (r.get("cuisine") or "").lower()))
+        memo[key] = hit
+    return hit
 
 def _slot_names(meals: Any) -> List[str]:
     if isinstance(meals, list) and all(isinstance(m, str) for m in meals):
@@ -290,14 +284,7 @@ def _can_fulfill_with_prep(rec: Dict[str, Any], shadow: Dict[str, int]) -> tuple
     We do NOT mutate/deduct the shadow here — planning remains non-destructive.
     """
     notes: List[str] = []
-    for ing in rec.get("ingredients", []):
-        raw_name = (ing.get("item") or "").strip()
-        qty = int(ing.get("quantity") or 0)
-        unit = _normalize_unit(ing.get("unit") or "count")
-        if not raw_name or qty <= 0:
-            continue
-
-        name_c, unit_n = _canon_name_unit(raw_name, unit)
+    for name_c, unit_n, qty in _recipe_requirements_canon(rec):
         exact_key = f"{name_c} ({unit_n})"
         have_exact = int(shadow.get(exact_key, 0))
 
@@ -325,23 +312,41 @@ def _shadow_pantry_snapshot_canon() -> dict[tuple[str, str], int]:
     Build a shadow pantry map with canonical names:
       (canonical_name, unit_family) -> quantity
     """
-    # read the single source-of-truth pantry DB
-    try:
-        items = dict(_pt._db.items)  # e.g., {'spinach (g)': 260, 'paneer (g)': 300, ...}
-    except Exception:
-        # extremely rare fallback: empty shadow
-        items = {}
-    shadow: dict[tuple[str, str], int] = {}
-    for k, v in items.items():
-        base_raw, unit_raw = _split_pantry_key(k)
-        name_c, unit_n = _canon_and_unit(base_raw, unit_raw)
-        shadow[(name_c, unit_n)] = shadow.get((name_c, unit_n), 0) + int(v or 0)
-    return shadow
+    # read the single source-of-truth pantry DB in place, e.g.
+    # {'spinach (g)': 260, 'paneer (g)': 300, ...}; missing DB -> empty shadow
+    _pt._db.refresh()
+    src = getattr(_pt._db, "items", None) or {}
+
+    def _build(pairs) -> dict[tuple[str, str], int]:
+        shadow: dict[tuple[str, str], int] = {}
+        for k, v in pairs:
+            base_raw, unit_raw = _split_pantry_key(k)
+            key = _canon_and_unit(base_raw, unit_raw)
+            shadow[key] = shadow.get(key, 0) + int(v or 0)
+        return shadow
 
-def _recipe_requirements_canon(rec: dict) -> list[tuple[str, str, int]]:
+    try:
+        return _build(src.items())
+    except RuntimeError:
+        # another session changed the DB mid-iteration: redo from a copy
+        return _build(list(src.items()))
+
+def _per_recipe(slot: str, rec: dict, build):
+    """build(rec), memoised per recipe object for the lifetime of the recipe snapshot."""
+    memo = _recipes_derived(slot, lambda _recipes: {})
+    hit = memo.get(id(rec))
+    if hit is None or hit[0] is not rec:
+        hit = memo[id(rec)] = (rec, build(rec))
+    return hit[1]
+
+def _recipe_requirements_canon(rec: dict) -> tuple[tuple[str, str, int], ...]:
     """
-    Return [(canonical_name, unit_family, qty), ...] for a recipe.
+    Return ((canonical_name, unit_family, qty), ...) for a recipe.
+    Memoised per recipe object for the lifetime of the recipe snapshot.
     """
+    return _per_recipe("meal_plan.reqs", rec, _build_requirements_canon)
+
+def _build_requirements_canon(rec: dict) -> tuple[tuple[str, str, int], ...]:
     out: list[tuple[str, str, int]] = []
     for ing in rec.get("ingredients", []):
         item = (ing.get("item") or "").strip()
@@ -351,7 +356,7 @@ def _recipe_requirements_canon(rec: dict) -> list[tuple[str, str, int]]:
             continue
         name_c, unit_n = _canon_and_unit(item, unit)
         out.append((name_c, unit_n, qty))
-    return out
+    return tuple(out)
 
 def _can_fulfill_strict_canon(rec: dict, shadow: dict[tuple[str, str], int]) -> bool:
     """
@@ -368,7 +373,8 @@ def _apply_deduction_canon(rec: dict, shadow: dict[tuple[str, str], int]) -> Non
     """
     for name_c, unit_n, qty in _recipe_requirements_canon(rec):
         key = (name_c, unit_n)
-        shadow[key] = max(0, int(shadow.get(key, 0)) - qty)
+        have = shadow.get(key, 0)
+        shadow[key] = have - qty if have > qty else 0
         
 def _tightness_key(rec: Dict[str, Any], shadow0: dict[tuple[str, str], int]) -> tuple:
     """
@@ -397,6 +403,28 @@ def _coverable_once_sorted(candidates: List[Dict[str, Any]],
     coverable.sort(key=lambda r: _tightness_key(r, shadow0))
     return coverable
 
+def _plan_summary(mode: str, plan: Dict[str, Dict[str, str]], day_nums,
+                  meals: List[str], filled: int) -> List[str]:
+    """Compact auto_plan reply parts: mode, filled/attempted slots, first 4 days."""
+    nice_mode = "Pantry-first (strict)" if mode == "pantry-first-strict" else "Freeform"
+    day_nums = list(day_nums)
+    msg = [f"Mode: {nice_mode}. Filled {filled}/{len(day_nums) * len(meals)} slots."]
+    lines = []
+    for n in day_nums[:4]:
+        row = plan.get(f"Day{n}", {})
+        lines.append(f"Day{n}: " + ", ".join(row.get(m, "—") for m in meals))
+    if lines:
+        msg.append(" " + " ".join(lines))
+    return msg
+
+@lru_cache(maxsize=256)
+def _day_num(day_key: str) -> int:
+    """'Day12' -> 12 (digits only, 0 if none); day keys repeat across calls."""
+    tail = day_key[3:]
+    if day_key.startswith("Day") and tail.isdecimal():
+        return int(tail)
+    return int("".join(filter(str.isdecimal, day_key)) or "0")
+
 @tool
 def auto_plan(payload: Dict[str, Any] | str | None = None) -> str:
     """
@@ -416,13 +444,8 @@ def auto_plan(payload: Dict[str, Any] | str | None = None) -> str:
     Repeat policy:
       • allow_repeats=False ⇒ avoid consecutive repeats (not global uniqueness).
     """
-    # Parse payload
-    if isinstance(payload, str):
-        try:
-            payload = json.loads(payload or "{}")
-        except Exception:
-            payload = {}
-    payload = payload or {}
+    # Parse payload (dicts pass straight through; unparseable -> defaults)
+    payload = parse_llm_json(payload) or {}
     days  = int(payload.get("days") or 3)
     meals = _slot_names(payload.get("meals"))
     cont  = bool(payload.get("continue") or False)
@@ -434,30 +457,62 @@ def auto_plan(payload: Dict[str, Any] | str | None = None) -> str:
     # Build slot list to fill in order
     start_at = 1
     if cont and plan:
-        existing_ns = [int(re.sub(r"\D", "", d) or "0") for d in plan.keys()]
-        start_at = (max(existing_ns) + 1) if existing_ns else 1
+        start_at = max(map(_day_num, plan), default=0) + 1
     target_days = list(range(start_at, start_at + days))
 
     # Candidate pool (filtered by cuisine/diet/time); deterministic order as tie-breaker
     candidates = _eligible_recipes(c)
-    candidates.sort(key=lambda r: ((r.get("name") or "").lower(), (r.get("cuisine") or "").lower()))
 
     # Shadow pantry for strict mode (canonicalized)
     shadow = _shadow_pantry_snapshot_canon() if c["mode"] == "pantry-first-strict" else {}
 
     filled = 0
-    total_slots = len(target_days) * len(meals)
 
     calc_log = memory.memories.get("calc_log", [])
     if not isinstance(calc_log, list):
         calc_log = []
 
     prev_dish_lower: Optional[str] = None
+    no_repeat = not c.get("allow_repeats", True)
 
     # ---- NEW: compute once-coverable set (from the initial pantry), sorted by tightness
     initial_shadow = dict(shadow)
     once_list = _coverable_once_sorted(candidates, initial_shadow) if shadow else []
-    once_names_left: set[str] = { (r.get("name") or "").strip().lower() for r in once_list }
+    # Lower-cased name and a dense int id per distinct name, computed once per
+    # candidate; "placed once" tracking is a byte flag per id (plus a count of
+    # flags still set), so same-named recipes still share one entry
+    name_ix: Dict[str, int] = {}
+    cand_name: Dict[int, tuple[str, int]] = {}
+    for r in candidates:
+        name_l = (r.get("name") or "").strip().lower()
+        cand_name[id(r)] = (name_l, name_ix.setdefault(name_l, len(name_ix)))
+    once_left = bytearray(len(name_ix))
+    for r in once_list:
+        once_left[cand_name[id(r)][1]] = 1
+    once_count = once_left.count(1)
+
+    # Feasibility memo for strict mode. The shadow only shrinks during a run, so
+    # a recipe that failed stays failed; one that passed needs re-checking only
+    # after a deduction touches one of its keys (found via the inverted index).
+    users: Dict[tuple[str, str], List[int]] = {}
+    if shadow:
+        for r in candidates:
+            for name_c, unit_n, _ in _recipe_requirements_canon(r):
+                users.setdefault((name_c, unit_n), []).append(id(r))
+    feasible: Dict[int, bool] = {}
+
+    def _fits(r: Dict[str, Any]) -> bool:
+        ok = feasible.get(id(r))
+        if ok is None:
+            ok = feasible[id(r)] = _can_fulfill_strict_canon(r, shadow)
+        return ok
+
+    def _take(r: Dict[str, Any]) -> None:
+        _apply_deduction_canon(r, shadow)
+        for name_c, unit_n, _ in _recipe_requirements_canon(r):
+            for rid in users.get((name_c, unit_n), ()):
+                if feasible.get(rid):
+                    del feasible[rid]
 
     for day_i in target_days:
         day_key = f"Day{day_i}"
@@ -474,46 +529,46 @@ def auto_plan(payload: Dict[str, Any] | str | None = None) -> str:
 
             if c["mode"] == "pantry-first-strict":
                 # ---------- PASS 1: prefer dishes not yet placed from the initial 100%-coverable set ----------
-                if once_names_left:
+                if once_count:
                     for r in once_list:
-                        name = (r.get("name") or "").strip()
-                        name_l = name.lower()
-                        if name_l not in once_names_left:
+                        name_l, ix = cand_name[id(r)]
+                        if not once_left[ix]:
                             continue
-                        if (not c.get("allow_repeats", True)) and prev_dish_lower and name_l == prev_dish_lower:
+                        if no_repeat and prev_dish_lower and name_l == prev_dish_lower:
                             continue
-                        if _can_fulfill_strict_canon(r, shadow):
+                        if _fits(r):
                             pick = r
                             pick_reason = "100% pantry coverage (once-each pass)"
-                            _apply_deduction_canon(pick, shadow)
-                            once_names_left.discard(name_l)
+                            _take(pick)
+                            once_left[ix] = 0
+                            once_count -= 1
                             break
 
                 # ---------- PASS 2: any coverable recipe now (still respects no-consecutive) ----------
                 if pick is None:
                     for r in candidates:
-                        name = (r.get("name") or "").strip()
-                        name_l = name.lower()
-                        if (not c.get("allow_repeats", True)) and prev_dish_lower and name_l == prev_dish_lower:
+                        name_l, ix = cand_name[id(r)]
+                        if no_repeat and prev_dish_lower and name_l == prev_dish_lower:
                             continue
-                        if _can_fulfill_strict_canon(r, shadow):
+                        if _fits(r):
                             pick = r
                             pick_reason = "100% pantry coverage"
-                            _apply_deduction_canon(pick, shadow)
+                            _take(pick)
                             # If it was also in once_list but we got to it only now, clear it
-                            once_names_left.discard(name_l)
+                            if once_left[ix]:
+                                once_left[ix] = 0
+                                once_count -= 1
                             break
 
             else:
-                # Freeform: any eligible (avoid consecutive if requested)
-                for r in candidates:
-                    name = (r.get("name") or "").strip()
-                    name_l = name.lower()
-                    if (not c.get("allow_repeats", True)) and prev_dish_lower and name_l == prev_dish_lower:
-                        continue
-                    pick = r
-                    pick_reason = "freeform pick"
-                    break
+                # Freeform: first eligible; with repeats off, at most one step past
+                # it (only the previous dish is excluded)
+                if candidates:
+                    pick = candidates[0]
+                    if no_repeat and prev_dish_lower and cand_name[id(pick)][0] == prev_dish_lower:
+                        pick = next((r for r in candidates[1:]
+                                     if cand_name[id(r)][0] != prev_dish_lower), None)
+                    pick_reason = "freeform pick" if pick else None
 
             # ---- assign or stop
             if not pick:
@@ -521,18 +576,7 @@ def auto_plan(payload: Dict[str, Any] | str | None = None) -> str:
                 # Summarize attempted part and exit
                 memory.memories["plan"] = plan
                 memory.memories["calc_log"] = calc_log
-                nice_mode = "Pantry-first (strict)" if c["mode"] == "pantry-first-strict" else "Freeform"
-
-                attempted_keys = [f"Day{n}" for n in range(start_at, day_i + 1)]
-                lines = []
-                for d in attempted_keys:
-                    row = plan.get(d, {})
-                    parts = [row.get(m, "—") for m in meals]
-                    lines.append(f"{d}: " + ", ".join(parts))
-
-                msg = [f"Mode: {nice_mode}. Filled {filled}/{len(attempted_keys)*len(meals)} slots."]
-                if lines:
-                    msg.append(" " + " ".join(lines[:min(4, len(lines))]))
+                msg = _plan_summary(c["mode"], plan, range(start_at, day_i + 1), meals, filled)
                 if c["mode"] == "pantry-first-strict":
                     msg.append(" I paused when your pantry couldn’t fully cover the next dish. Say \"allow repeats\", \"relax cuisine/diet/time\", or \"switch to freeform\".")
                 return "".join(msg)
@@ -542,34 +586,26 @@ def auto_plan(payload: Dict[str, Any] | str | None = None) -> str:
             prev_dish_lower = dish.lower()
             filled += 1
 
-            calc_log.append({
-                "slot": f"{day_key} » {meal}",
-                "dish": dish,
-                "virtual_deducted": [],
-                "still_missing": [],
-                "reason": pick_reason or "",
-            })
+            calc_log.append((f"{day_key} » {meal}", dish, pick_reason or ""))
 
     # Completed all slots
     memory.memories["plan"] = plan
     memory.memories["calc_log"] = calc_log
-    nice_mode = "Pantry-first (strict)" if c["mode"] == "pantry-first-strict" else "Freeform"
-
-    # Summary (compact)
-    lines = []
-    for d in [f"Day{n}" for n in target_days]:
-        row = plan.get(d, {})
-        parts = [row.get(m, "—") for m in meals]
-        lines.append(f"{d}: " + ", ".join(parts))
-
-    msg = [f"Mode: {nice_mode}. Filled {filled}/{total_slots} slots."]
-    if lines:
-        msg.append(" " + " ".join(lines[:min(4, len(lines))]))
-    return "".join(msg)
+    return "".join(_plan_summary(c["mode"], plan, target_days, meals, filled))
 
 ##############################################################################
 # 2 · update_plan – mutate planner_state (no shadow-pantry simulation)
 ##############################################################################
+def _calc_log_view() -> List[Dict[str, Any]]:
+    """
+    calc_log as dicts for display. Entries are stored as (slot, dish, reason)
+    tuples; the empty deduction fields are kept for UI compatibility.
+    """
+    return [
+        {"slot": slot, "dish": dish, "virtual_deducted": [], "still_missing": [], "reason": reason}
+        for slot, dish, reason in memory.memories.get("calc_log") or []
+    ]
+
 @tool
 def update_plan(payload: Dict[str, Any] | str | None = None) -> str:
     """Write a recipe into the plan for a given slot, and record a calc entry.
@@ -580,14 +616,9 @@ def update_plan(payload: Dict[str, Any] | str | None = None) -> str:
     print("DEBUG update_plan type:", type(payload))
 
     # tolerate quoted JSON from the model
-    if isinstance(payload, str):
-        try:
-            payload = json.loads(payload)
-        except Exception:
-            return "Error: update_plan expects a JSON object with keys day, meal, recipe_name."
-
-    if not isinstance(payload, dict):
-        return "Error: update_plan payload must be an object."
+    payload = parse_llm_json(payload)
+    if payload is None:
+        return "Error: update_plan expects a JSON object with keys day, meal, recipe_name."
 
     day  = payload.get("day") or payload.get("slot", {}).get("day")
     meal = payload.get("meal") or payload.get("slot", {}).get("meal")
@@ -606,15 +637,7 @@ def update_plan(payload: Dict[str, Any] | str | None = None) -> str:
     calc_log = memory.memories.get("calc_log", [])
     if not isinstance(calc_log, list):
         calc_log = []
-    entry = {
-        "slot": f"{day} » {meal}",
-        "dish": recipe_name,
-        "virtual_deducted": [],   # kept for UI compatibility
-        "still_missing": [],      # kept for UI compatibility
-    }
-    if reason:
-        entry["reason"] = reason
-    calc_log.append(entry)
+    calc_log.append((f"{day} » {meal}", recipe_name, reason or ""))
     memory.memories["calc_log"] = calc_log
 
     return f"Set {day} » {meal} to {recipe_name}."
@@ -650,93 +673,128 @@ except Exception:
 ##############################################################################
 PANTRY_JSON_PATH = os.path.join(ROOT_DIR, "data", "pantry.json")
 
+_PANTRY_CACHE: Dict[str, Any] = {"stamp": None, "data": {}}
+
 def _load_pantry() -> Dict[str, int]:
+    """
+    pantry.json contents, re-parsed only when (mtime, size) changes.
+    The dict is shared between callers: treat it as read-only.
+    """
     try:
-        with open(PANTRY_JSON_PATH, "r", encoding="utf-8") as fp:
-            return json.load(fp)
+        st = os.stat(PANTRY_JSON_PATH)
     except FileNotFoundError:
         return {}
-    except json.JSONDecodeError:
-        return {}
-
+    stamp = (st.st_mtime_ns, st.st_size)
+    if stamp != _PANTRY_CACHE["stamp"]:
+        try:
+            with open(PANTRY_JSON_PATH, "rb") as fp:
+                data = _json_loads(fp.read())
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            data = {}
+        _PANTRY_CACHE.update(stamp=stamp, data=data)
+    return _PANTRY_CACHE["data"]
+
+@lru_cache(maxsize=4096)
 def _normalise(name: str) -> str:
     """Lower-case and strip very simple plurals (onions → onion)."""
-    n = (name or "").strip().lower()
+    n = (name or "").strip().casefold()
     if n.endswith("ies"):
-        n = n[:-3] + "y"
-    elif n.endswith("s") and len(n) > 3:
-        n = n[:-1]
+        return n[:-3] + "y"
+    if len(n) > 3 and n[-1] == "s":
+        return n[:-1]
     return n
 
 # --- unit normalization ---
+_UNIT_ALIASES: Dict[str, str] = {
+    "g": "g", "gram": "g", "grams": "g", "gms": "g",
+    "kg": "g", "kilogram": "g", "kilograms": "g",
+    "ml": "ml", "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "l": "ml", "liter": "ml", "liters": "ml", "litre": "ml", "litres": "ml",
+    "count": "count", "piece": "count", "pieces": "count", "pc": "count", "pcs": "count",
+}
+
+@lru_cache(maxsize=4096)
 def _normalize_unit(u: Optional[str]) -> str:
     """Map many spellings to {'g','ml','count'}."""
     if not u:
         return "count"
     s = str(u).strip().lower()
-    aliases = {
-        "g": "g", "gram": "g", "grams": "g", "gms": "g",
-        "kg": "g", "kilogram": "g", "kilograms": "g",
-        "ml": "ml", "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
-        "l": "ml", "liter": "ml", "liters": "ml", "litre": "ml", "litres": "ml",
-        "count": "count", "piece": "count", "pieces": "count", "pc": "count", "pcs": "count",
-    }
-    return aliases.get(s, s)
-
-_name_unit_re = re.compile(r"^\s*(.*?)\s*\(([^)]+)\)\s*$")
+    return _UNIT_ALIASES.get(s, s)
 
+@lru_cache(maxsize=4096)
 def _split_pantry_key(key: str) -> Tuple[str, str]:
     """'tomato (count)' -> ('tomato','count'), 'rice (g)' -> ('rice','g')"""
-    m = _name_unit_re.match(key)
-    if not m:
-        base = key.split("(")[0]
-        return _normalise(base), "count"
-    return _normalise(m.group(1)), _normalize_unit(m.group(2))
-
-def _find_matching_key(pantry, item, unit):
-    name_c, unit_n = _canon_and_unit(item, unit or "count")
-    for k in pantry.keys():
-        b, u = _split_pantry_key(k)
-        if _canon(b) == name_c and _normalize_unit(u) == unit_n:
-            return k
-    return None
+    # Plain str.find parsing: the unit is the trailing "(...)" group with no
+    # ')' inside; anything else falls back to the text before the first '('.
+    t = key.rstrip()
+    if t.endswith(")"):
+        j = len(t) - 1
+        i = t.find("(", t.rfind(")", 0, j) + 1)
+        if 0 <= i < j - 1:
+            return _normalise(t[:i]), _normalize_unit(t[i + 1:j])
+    return _normalise(key.split("(")[0]), "count"
+
+_PANTRY_INDEX_CACHE: Dict[str, Any] = {"keys": None, "index": {}}
+
+def _pantry_index(pantry: Dict[str, Any]) -> Dict[Tuple[str, str], str]:
+    """
+    (canonical base, unit family) -> pantry key; first key wins on collisions.
+    The index only depends on the key set, so it is reused until a key is
+    added or removed (quantity changes don't invalidate it).
+    """
+    keys = tuple(pantry)
+    if keys != _PANTRY_INDEX_CACHE["keys"]:
+        index: Dict[Tuple[str, str], str] = {}
+        for k in keys:
+            b, u = _split_pantry_key(k)
+            index.setdefault((_canon(b), _normalize_unit(u)), k)
+        _PANTRY_INDEX_CACHE.update(keys=keys, index=index)
+    return _PANTRY_INDEX_CACHE["index"]
+
+def _find_matching_key(index: Dict[Tuple[str, str], str], item, unit):
+    return index.get(_canon_and_unit(item, unit or "count"))
+
+def _recipe_index() -> Dict[str, Dict[str, Any]]:
+    # cuisine_tools' shared name index, rebuilt only when recipe.json reloads
+    return _recipes_derived("by_name", _build_name_map)
 
 def _load_recipe_by_name(name: str) -> Dict[str, Any] | None:
-    name_l = (name or "").strip().lower()
-    for r in _load_recipes():
-        if r["name"].strip().lower() == name_l:
-            return r
-    return None
+    name_l = _name_key(name)
+    rec = _recipe_index().get(name_l)
+    if rec is None and name_l:
+        # typo-tolerant fallback (e.g. "palak panner") instead of silently
+        # dropping the dish from shopping lists / cook_meal
+        rec = _find_recipe(name_l)
+    return rec
 
 ##############################################################################
 # 5 · save_plan – write plan + quantity shopping list to disk
 ##############################################################################
-def _collect_plan_requirements(plan: Dict[str, Dict[str, str]]) -> Dict[Tuple[str,str], int]:
-    """Sum required qty per (item,unit) across the whole plan."""
-    need: Dict[Tuple[str,str], int] = {}
-    recipes = {r["name"].lower(): r for r in _load_recipes()}
+def _iter_plan_ingredients(plan: Dict[str, Dict[str, str]]):
+    """Yield (canonical_item, unit, qty) for every ingredient of every planned dish."""
     for day_dict in plan.values():
         for dish in day_dict.values():
-            rec = recipes.get(dish.lower())
-            if not rec:
-                continue
-            for ing in rec.get("ingredients", []):
-                item = _canon(ing.get("item",""))
-                _, unit = _canon_and_unit(item, ing.get("unit") or "count")  # re-normalize unit family
-
-                qty  = int(ing.get("quantity") or 0)
-                if qty <= 0 or not item:
-                    continue
-                need[(item, unit)] = need.get((item, unit), 0) + qty
-    return need
+            rec = _load_recipe_by_name(dish)
+            if rec:
+                yield from _recipe_requirements_canon(rec)
 
 def _quantity_shopping_deficits(plan: Dict[str, Dict[str, str]]) -> List[Dict[str, Any]]:
-    """Compare plan needs to pantry and return deficits with quantities."""
+    """
+    Sum required qty per (item,unit) across the whole plan, then compare to
+    the pantry and return deficits with quantities (single plan traversal).
+    """
+    need: Counter = Counter()   # (item, unit) -> total qty
+    for item, unit, qty in _iter_plan_ingredients(plan):
+        if item:
+            need[(item, unit)] += qty
+
     pantry = _load_pantry()
-    needs = _collect_plan_requirements(plan)
+    index = _pantry_index(pantry)
     deficits: List[Dict[str, Any]] = []
-    for (item, unit), need_qty in needs.items():
-        key = _find_matching_key(pantry, item, unit)
+    for (item, unit), need_qty in need.items():
+        key = _find_matching_key(index, item, unit)
         have = int(pantry.get(key, 0)) if key else 0
         buy = max(0, need_qty - have)
         if buy > 0:
@@ -764,6 +822,16 @@ def get_shopping_list(_: str | None = None) -> str:
     memory.memories["shopping_list"] = deficits
     return _format_deficits(deficits)
 
+# (path, content digest, (mtime_ns, size)) of the last plan file we wrote
+_LAST_PLAN_SAVE: Dict[str, Any] = {"key": None}
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
 @tool
 def save_plan(payload: Dict[str, Any] | str | None = None) -> str:
     """Persist the current plan (with constraints & shopping list) to /plans.
@@ -788,95 +856,84 @@ def save_plan(payload: Dict[str, Any] | str | None = None) -> str:
     safe_name = file_name.replace(" ", "_")
 
     path = Path(PLAN_DIR) / f"{safe_name}.json"
-    with open(path, "w", encoding="utf-8") as fp:
-        json.dump(data, fp, indent=2, ensure_ascii=False)
+
+    # Skip the write when this exact content was already saved to this path
+    # and the file is still the one we wrote (same mtime/size stamp)
+    blob   = dumps_pretty(data)
+    digest = hashlib.blake2b(blob, digest_size=16).digest()
+    if _LAST_PLAN_SAVE["key"] != (str(path), digest, _file_stamp(path)):
+        write_json_atomic(path, data, blob=blob)
+        _LAST_PLAN_SAVE["key"] = (str(path), digest, _file_stamp(path))
 
     return f"Saved plan to {path.relative_to(ROOT_DIR)}"
 
 ##############################################################################
 # 6 · cook_meal – mark a slot/dish cooked and consume ingredients from pantry
 ##############################################################################
-def _deduct_one(item: str, qty: int, unit: str) -> None:
-    # Normalize exactly like pantry tools do
-    name = _pt._canon_item(item)
-    u    = _pt._norm_unit(unit or "count")
-    _pt._db.remove(name, int(qty), u)
+@lru_cache(maxsize=4096)
+def _cook_key(item: str, unit: str) -> Tuple[str, str]:
+    """(canonical item, unit) exactly as pantry_tools keys them, per raw ingredient."""
+    return _canon_item(item), _norm_unit(_normalize_unit(unit))
 
-@tool
-def cook_meal(payload: Dict[str, Any] | str) -> str:
-    """
-    Mark a meal cooked and subtract ingredients from pantry.
+_EMPTY: Dict[str, Any] = {}   # shared read-only default; never mutate or hand out
 
-    Accepts either:
-      {"day":"Day1","meal":"Lunch"}   -> look up dish in planner_state["plan"]
-      {"dish":"Palak Paneer"}         -> use dish directly
-    """
-    # Parse payload (allow JSON string)
-    if isinstance(payload, str):
-        try:
-            payload = json.loads(payload)
-        except Exception:
-            payload = {"dish": payload}
-
-    if not isinstance(payload, dict):
-        return "Error: cook_meal expects an object or dish name."
-
-    # Resolve the dish name
+def _resolve_dish(payload: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """Return (dish, None) for {"dish":..} or {"day":..,"meal":..}; else (None, error)."""
     dish = payload.get("dish")
     if not dish:
-        if not (payload.get("day") and payload.get("meal")):
-            return "Error: provide {'dish':name} or {'day':..,'meal':..}."
-        plan = memory.memories.get("plan", {}) or {}
-        day_plan = plan.get(payload["day"], {}) or {}
-        dish = day_plan.get(payload["meal"])
+        day = payload.get("day")
+        meal = payload.get("meal")
+        if not (day and meal):
+            return None, "Error: provide {'dish':name} or {'day':..,'meal':..}."
+        plan = memory.memories.get("plan") or _EMPTY
+        dish = (plan.get(day) or _EMPTY).get(meal)
         if not dish:
-            return f"Error: no dish set for {payload['day']} » {payload['meal']}."
+            return None, f"Error: no dish set for {day} » {meal}."
+    return dish, None
 
-    recipe = _load_recipe_by_name(dish)
-    if not recipe:
-        return f"Error: recipe '{dish}' not found."
-
-    # Build deducted/missing summaries by comparing before/after around the single
-    # source-of-truth pantry DB (_pt._db). DO NOT write the JSON file here.
-    deducted, missing = [], []
-
-    for ing in recipe.get("ingredients", []):
+def _build_cook_lines(recipe: dict) -> tuple[tuple[str, int, str, str], ...]:
+    """(item as written, need_qty, canonical name, unit) per usable ingredient line."""
+    lines = []
+    for ing in recipe.get("ingredients") or ():
         item = (ing.get("item") or "").strip()
-        need_qty = int(ing.get("quantity", 0) or 0)
-        unit = _normalize_unit(ing.get("unit") or "count")
+        q = ing.get("quantity", 0)
+        need_qty = q if type(q) is int else int(q or 0)   # recipe.json stores ints
         if not item or need_qty <= 0:
             continue
+        lines.append((item, need_qty) + _cook_key(item, ing.get("unit") or "count"))
+    return tuple(lines)
 
-        # Canonical key for "before" snapshot
-        name_c = _pt._canon_item(item)
-        unit_n = _pt._norm_unit(unit)
-        key = f"{name_c} ({unit_n})"
-        before = int(_pt._db.items.get(key, 0))
-
-        # Deduct via pantry DB (this also mirrors alt units!)
-        _deduct_one(item, need_qty, unit)
+def _cook_dish(dish: str, short: bool = False) -> str:
+    """Deduct one dish's ingredients from the pantry DB, log it, and summarise
+    (headline only when *short*)."""
+    recipe = _load_recipe_by_name(dish)
+    if not recipe:
+        return f"Error: recipe '{dish}' not found."
 
-        after = int(_pt._db.items.get(key, 0))
-        used = min(before, need_qty)
+    # Build deducted/missing summaries from what the single source-of-truth
+    # pantry DB (_pt._db) actually took per line. DO NOT write the JSON file here.
+    deducted: List[str] = []
+    missing: List[str] = []
+    lines = _per_recipe("meal_plan.cook_lines", recipe, _build_cook_lines)
 
-        if used > 0:
-            deducted.append(f"{used} {unit_n} {item}")
-        if used < need_qty:
-            missing.append(f"{need_qty - used} {unit_n} {item}")
+    # Deduct via pantry DB in one call (this also mirrors alt units!);
+    # nothing to deduct means the pantry is not touched at all
+    if lines:
+        taken = _pt._db.consume([(name_c, need_qty, unit_n) for _, need_qty, name_c, unit_n in lines])
+        rows = list(zip(lines, taken))
+        deducted = ["%d %s %s" % (used, unit_n, item)
+                    for (item, _, _, unit_n), used in rows if used > 0]
+        missing = ["%d %s %s" % (need_qty - used, unit_n, item)
+                   for (item, need_qty, _, unit_n), used in rows if used < need_qty]
 
-    # (No direct file writes; _pt._db already saved.)
+    # (No direct file writes; _pt._db saves, once per batch.)
 
-    # Log for UI
-    log = memory.memories.setdefault("planner_log", [])
-    log.append({
-        "event": "cooked",
-        "dish": dish,
-        "deducted": deducted,
-        "missing": missing,
-    })
-    memory.memories["planner_log"] = log
+    # Log for UI: (event, dish, deducted, missing)
+    memory.memories.setdefault("planner_log", []).append(("cooked", dish, deducted, missing))
 
     parts = [f"✅ Marked cooked: {dish.title()}."]
+    if short:
+        return parts[0]
     if deducted:
         parts.append("Consumed: " + ", ".join(deducted) + ".")
     if missing:
@@ -884,3 +941,65 @@ def cook_meal(payload: Dict[str, Any] | str) -> str:
     if not deducted and not missing:
         parts.append("No ingredient lines were found in the recipe.")
     return " ".join(parts)
+
+@tool
+def cook_meal(payload: Dict[str, Any] | str) -> str:
+    """
+    Mark a meal cooked and subtract ingredients from pantry.
+
+    Accepts either:
+      {"day":"Day1","meal":"Lunch"}   -> look up dish in planner_state["plan"]
+      {"dish":"Palak Paneer"}         -> use dish directly
+    """
+    # Parse payload (allow JSON string, else treat the string as the dish name)
+    if isinstance(payload, str):
+        parsed = parse_llm_json(payload)
+        payload = {"dish": payload} if parsed is None else parsed
+
+    if not isinstance(payload, dict):
+        return "Error: cook_meal expects an object or dish name."
+
+    dish, err = _resolve_dish(payload)
+    if err:
+        return err
+    with _pt._db.batch():
+        return _cook_dish(dish)
+
+@tool
+def cook_meals(payload: Dict[str, Any] | List[Any] | str) -> str:
+    """
+    Mark several meals cooked in one go; the pantry file is written once.
+
+    Accepts {"meals": [...]} or a bare list, where each entry is anything
+    cook_meal accepts: {"day":..,"meal":..}, {"dish":..} or a dish name.
+    Returns one cook_meal-style line per entry; with {"short": true} alongside
+    "meals", only the "✅ Marked cooked" headline per entry.
+    """
+    if isinstance(payload, str):
+        parsed = parse_llm_json(payload)  # objects, fenced or not
+        if parsed is None:
+            try:
+                parsed = _json_loads(payload)  # a bare JSON list
+            except ValueError:
+                parsed = None
+        if parsed is None:
+            return "Error: cook_meals expects {'meals': [...]} or a list."
+        payload = parsed
+    short = False
+    if isinstance(payload, dict):
+        short = bool(payload.get("short"))
+        payload = payload["meals"] if "meals" in payload else [payload]
+    if not isinstance(payload, list) or not payload:
+        return "Error: cook_meals expects {'meals': [...]} or a list."
+
+    lines = []
+    with _pt._db.batch():
+        for entry in payload:
+            if isinstance(entry, str):
+                entry = {"dish": entry}
+            if not isinstance(entry, dict):
+                lines.append("Error: each meal must be an object or dish name.")
+                continue
+            dish, err = _resolve_dish(entry)
+            lines.append(err or _cook_dish(dish, short))
+    return "\n".join(lines)
@@ -2,13 +2,18 @@
 # Supports partial removals and auto-maintains alternate-unit mirrors (e.g., spinach bunches ↔ grams)
 
 from __future__ import annotations
+import atexit
 import json
 import os
+from contextlib import contextmanager
+from functools import lru_cache
 from typing import Dict, Optional, List, Tuple
 
 from dotenv import load_dotenv
 from langchain_core.tools import tool
 
+from tools.jsonio import loads as _json_loads, write_json_atomic
+
 load_dotenv()
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "data")
@@ -32,52 +37,77 @@ def _load_alt_rules() -> dict:
     }
     """
     try:
-        with open(ALT_UNITS_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if not isinstance(data, dict):
-                return {"rules": [], "labels": {}}
-            data.setdefault("rules", [])
-            data.setdefault("labels", {})
-            return data
+        with open(ALT_UNITS_PATH, "rb") as f:
+            data = _json_loads(f.read())
+        if not isinstance(data, dict):
+            return {"rules": [], "labels": {}}
+        data.setdefault("rules", [])
+        data.setdefault("labels", {})
+        return data
     except FileNotFoundError:
         # Safe default: empty rules, no mirroring
         return {"rules": [], "labels": {}}
     except Exception:
         return {"rules": [], "labels": {}}
 
-_ALT = _load_alt_rules()
-
+@lru_cache(maxsize=1024)
 def _canon_item(s: str) -> str:
     return str(s or "").strip().lower()
 
+_UNIT_MAP = {
+    "kg": "g", "kilogram": "g", "kilograms": "g",
+    "g": "g", "gram": "g", "grams": "g", "gms": "g",
+    "l": "ml", "litre": "ml", "liter": "ml", "liters": "ml", "litres": "ml",
+    "ml": "ml", "millilitre": "ml", "milliliter": "ml", "milliliters": "ml", "millilitres": "ml",
+    "count": "count", "pc": "count", "pcs": "count", "piece": "count", "pieces": "count",
+}
+
+@lru_cache(maxsize=1024)
 def _norm_unit(u: Optional[str]) -> str:
     if not u: return "count"
     u = str(u).strip().lower()
-    if u in ("kg", "kilogram", "kilograms"): return "g"
-    if u in ("g", "gram", "grams", "gms"):  return "g"
-    if u in ("l", "litre", "liter", "liters", "litres"): return "ml"
-    if u in ("ml", "millilitre", "milliliter", "milliliters", "millilitres"): return "ml"
-    if u in ("count", "pc", "pcs", "piece", "pieces"): return "count"
-    return u
+    return _UNIT_MAP.get(u, u)  # unknown units pass through as-is
 
+@lru_cache(maxsize=4096)
 def _key(item: str, unit: str) -> str:
     return f"{_canon_item(item)} ({_norm_unit(unit)})"
 
-def _round_to_step(value: float, step: Optional[int|float]) -> int:
+def _round_to_step(value: int|float, step: Optional[int|float]) -> int:
     if not step or step <= 0:
         # nearest integer
         return int(round(value))
+    if type(value) is int and type(step) is int:
+        # integer factor and step: same round-half-even result, no floats
+        q, r = divmod(value, step)
+        if 2 * r > step or (2 * r == step and q & 1):
+            q += 1
+        return q * step
     return int(round(value / step) * step)
 
-def _alt_transforms_for(item: str, unit_from: str) -> List[dict]:
+AltRule = Tuple[str, int|float, Optional[int|float]]  # (unit_to, factor, round step)
+
+def _index_alt_rules(rules: list) -> Dict[Tuple[str, str], Tuple[AltRule, ...]]:
+    """(canon item, from-unit) -> pre-parsed rules, in file order."""
+    index: Dict[Tuple[str, str], List[AltRule]] = {}
+    for r in rules:
+        try:
+            factor = float(r.get("factor", 1))
+            if factor.is_integer():
+                factor = int(factor)  # whole factors (125 g per bunch) mirror in int math
+            parsed = (_norm_unit(r.get("to")), factor, r.get("round"))
+            k = (_canon_item(r.get("item")), _norm_unit(r.get("from")))
+        except (AttributeError, TypeError, ValueError):
+            continue  # malformed rule: no mirroring for it
+        index.setdefault(k, []).append(parsed)
+    return {k: tuple(v) for k, v in index.items()}
+
+_ALT = _load_alt_rules()
+_ALT_INDEX = _index_alt_rules(_ALT["rules"])
+_NO_RULES: Tuple[AltRule, ...] = ()
+
+def _alt_transforms_for(item: str, unit_from: str) -> Tuple[AltRule, ...]:
     """All rules that match this item + from-unit."""
-    item = _canon_item(item)
-    unit_from = _norm_unit(unit_from)
-    rules = []
-    for r in _ALT.get("rules", []):
-        if _canon_item(r.get("item")) == item and _norm_unit(r.get("from")) == unit_from:
-            rules.append(r)
-    return rules
+    return _ALT_INDEX.get((_canon_item(item), _norm_unit(unit_from)), _NO_RULES)
 
 # -------------------------- JSON storage -----------------------------
 
@@ -86,33 +116,71 @@ class _PantryDB:
 
     def __init__(self, path: str = DATA_PATH):
         self.path = path
+        self._batch_depth = 0
+        self._dirty = False  # items changed since the last write
         self._load()
 
+    def _disk_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def refresh(self) -> None:
+        """
+        Re-read pantry.json if it changed on disk since we last read or wrote
+        it (e.g. edited by hand while the app runs). Unsaved in-memory edits win.
+        """
+        if not self._dirty and self._disk_stamp() != self._stamp:
+            self._load()
+
     def _load(self):
+        self._stamp = self._disk_stamp()
         if os.path.exists(self.path):
             try:
-                with open(self.path, "r", encoding="utf-8") as f:
-                    self.items: Dict[str, int] = json.load(f)
-                    # normalize keys on load
-                    nitems: Dict[str, int] = {}
-                    for k, v in (self.items or {}).items():
-                        # try to split "<name> (<unit>)"
-                        if "(" in k and k.endswith(")"):
-                            base, unit = k.rsplit("(", 1)
-                            base = base.strip()
-                            unit = unit[:-1]  # drop ")"
-                        else:
-                            base, unit = k, "count"
-                        nitems[_key(base, unit)] = int(v)
-                    self.items = nitems
+                with open(self.path, "rb") as f:
+                    self.items: Dict[str, int] = _json_loads(f.read())
+                # normalize keys on load
+                nitems: Dict[str, int] = {}
+                for k, v in (self.items or {}).items():
+                    # try to split "<name> (<unit>)"
+                    if "(" in k and k.endswith(")"):
+                        base, unit = k.rsplit("(", 1)
+                        base = base.strip()
+                        unit = unit[:-1]  # drop ")"
+                    else:
+                        base, unit = k, "count"
+                    nitems[_key(base, unit)] = int(v)
+                self.items = nitems
             except Exception:
                 self.items = {}
         else:
             self.items = {}
 
     def _save(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.items, f, indent=2)
+        # inside batch(): written once when the outermost block exits. Other
+        # modules read pantry.json from disk, so writes are not deferred further.
+        if not self._batch_depth:
+            self.commit()
+
+    def commit(self) -> None:
+        """Write pantry.json if anything changed since the last write."""
+        if self._dirty:
+            write_json_atomic(self.path, self.items)
+            self._dirty = False
+            self._stamp = self._disk_stamp()
+
+    @contextmanager
+    def batch(self):
+        """Group several mutations so pantry.json is written once at the end."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self.commit()
 
     # --- core mutations + mirroring ----------------------------------
 
@@ -124,8 +192,10 @@ class _PantryDB:
         if new_val <= 0:
             if k in self.items:
                 del self.items[k]
-        else:
+                self._dirty = True
+        elif new_val != current:
             self.items[k] = new_val
+            self._dirty = True
 
     def _set_exact(self, item: str, unit: str, qty: int) -> None:
         """Set item(unit) exactly to qty; drop if <=0."""
@@ -133,17 +203,16 @@ class _PantryDB:
         if qty <= 0:
             if k in self.items:
                 del self.items[k]
-        else:
+                self._dirty = True
+        elif self.items.get(k) != int(qty):
             self.items[k] = int(qty)
+            self._dirty = True
 
     def _mirror_delta(self, item: str, unit_from: str, delta: int) -> None:
         """When we add/remove a delta in (item, unit_from), apply configured delta in every mapped 'to' unit."""
         if delta == 0:
             return
-        for rule in _alt_transforms_for(item, unit_from):
-            unit_to = _norm_unit(rule.get("to"))
-            factor  = float(rule.get("factor", 1))
-            step    = rule.get("round")  # can be None
+        for unit_to, factor, step in _alt_transforms_for(item, unit_from):
             # compute signed delta in target unit
             raw = delta * factor
             d_to = _round_to_step(raw, step)
@@ -152,10 +221,7 @@ class _PantryDB:
 
     def _mirror_set(self, item: str, unit_from: str, qty: int) -> None:
         """When we set (item, unit_from) exactly to qty, overwrite target units with transformed qty."""
-        for rule in _alt_transforms_for(item, unit_from):
-            unit_to = _norm_unit(rule.get("to"))
-            factor  = float(rule.get("factor", 1))
-            step    = rule.get("round")
+        for unit_to, factor, step in _alt_transforms_for(item, unit_from):
             raw = qty * factor
             q_to = _round_to_step(raw, step)
             self._set_exact(item, unit_to, q_to)
@@ -163,6 +229,7 @@ class _PantryDB:
     # --- public CRUD --------------------------------------------------
 
     def add(self, item: str, qty: int, unit: str) -> str:
+        self.refresh()
         item = _canon_item(item)
         unit = _norm_unit(unit)
         if qty <= 0:
@@ -175,6 +242,7 @@ class _PantryDB:
         return f"✅ Added {qty} {unit} of {item}. Now you have {self.items.get(_key(item, unit), 0)} {unit}."
 
     def update(self, item: str, qty: int, unit: str) -> str:
+        self.refresh()
         item = _canon_item(item)
         unit = _norm_unit(unit)
         if qty < 0:
@@ -187,6 +255,7 @@ class _PantryDB:
         return f"🔄 Set {item} to {qty} {unit}."
 
     def remove(self, item: str, qty: Optional[int], unit: str) -> str:
+        self.refresh()
         item = _canon_item(item)
         unit = _norm_unit(unit)
         k = _key(item, unit)
@@ -217,7 +286,33 @@ class _PantryDB:
             return f"🗑️ Removed {qty} {unit} of {item}. Remaining: 0."
         return f"🗑️ Removed {qty} {unit} of {item}. Remaining: {left} {unit}."
 
+    def consume(self, lines: List[Tuple[str, int, str]]) -> List[int]:
+        """
+        Partial removal of several (item, qty, unit) lines with one save; item and
+        unit must already be canonical. Lines are applied in order (mirrors
+        included), exactly as successive remove() calls would be. Returns the
+        amount actually taken for each line.
+        """
+        self.refresh()
+        taken: List[int] = []
+        touched = False
+        for item, qty, unit in lines:
+            k = _key(item, unit)
+            if k not in self.items:
+                taken.append(0)
+                continue
+            existing = int(self.items.get(k, 0))
+            delta = -min(int(qty), existing)  # don't underflow
+            self._bump(item, unit, delta)
+            self._mirror_delta(item, unit, delta)
+            taken.append(-delta)
+            touched = True
+        if touched:
+            self._save()
+        return taken
+
     def list(self) -> str:
+        self.refresh()
         if not self.items:
             return "📭 Pantry is empty."
         # Stable, human-readable
@@ -227,6 +322,7 @@ class _PantryDB:
         return "\n".join(lines)
 
 _db = _PantryDB()
+atexit.register(_db.commit)  # last-chance flush of unsaved changes (e.g. a failed write)
 
 # -------------------------- tool I/O wrappers ------------------------
 
@@ -1,6 +1,9 @@
 # tools/textnorm.py
 from __future__ import annotations
 import os, re
+from functools import lru_cache
+from sys import intern
+from types import MappingProxyType
 from typing import List, Tuple
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -16,7 +19,9 @@ def _lazy_load_spacy():
     try:
         import spacy  # type: ignore
         model = os.getenv("SPACY_MODEL", "en_core_web_sm")
-        _NLP = spacy.load(model, disable=["ner", "textcat"])  # fast + we only need tagger/dep/lemmatizer
+        # exclude (not just disable) so NER/textcat are never loaded; keep
+        # attribute_ruler, which the rule-based lemmatizer depends on
+        _NLP = spacy.load(model, exclude=["ner", "textcat"])  # we only need tagger/dep/lemmatizer
     except Exception as e:
         _SPACY_ERR = e
         _NLP = None
@@ -34,6 +39,9 @@ try:
 except Exception:
     _INFLECT = None
 
+_IES_RE = re.compile(r"[^aeiou]ies$")
+_ES_RE = re.compile(r"(?:ch|sh|x|z|s)es$")
+
 def _singular_fallback(word: str) -> str:
     w = word.strip().lower()
     if not w:
@@ -47,10 +55,10 @@ def _singular_fallback(word: str) -> str:
         if isinstance(s, str) and s:
             return s
     # crude endings if inflect missing
-    if re.search(r"([^aeiou]ies)$", w):
-        return re.sub(r"ies$", "y", w)
-    if re.search(r"(ches|shes|xes|zes|ses)$", w):
-        return re.sub(r"es$", "", w)
+    if _IES_RE.search(w):
+        return w[:-3] + "y"
+    if _ES_RE.search(w):
+        return w[:-2]
     if w.endswith("s") and len(w) > 3:
         return w[:-1]
     return w
@@ -59,57 +67,58 @@ def _singular_fallback(word: str) -> str:
 # Spelling/orthography folds (tiny, surgical; NOT a big alias map)
 # ─────────────────────────────────────────────────────────────────────────────
 # Normalize chili/chile/chilli/chillies → chili
-STATE_ADJS = {"cooked","boiled","steamed","raw","dried","fresh","smoked","roasted","grilled","fried","baked"}
-CHILI_ALIASES = {
+CHILI_ALIASES = MappingProxyType({
     "chilli":"chili", "chillies":"chili", "chilly":"chili", "chilles":"chili",
     "chile":"chili", "chiles":"chili"
-}
-_CHILI_RE = re.compile(r"^chil(?:i|ie|ies|y|li|lies|lies?)$", re.I)
+})
+# exactly the spellings the old ^chil(?:i|ie|ies|y|li|lies?)$ pattern matched
+_CHILI_FORMS = frozenset({"chili", "chilie", "chilies", "chily", "chilli", "chillie", "chillies"})
+
+_ASCII_FOLD = str.maketrans({"’": "'", "‘": "'", "“": '"', "”": '"'})
 
 def _fold_token_spelling(tok: str) -> str:
     t = tok.strip().lower()
     if not t:
         return t
-    if _CHILI_RE.match(t):
+    if t in _CHILI_FORMS:
         return "chili"
     # Common ASCII unifications
-    t = t.replace("’", "'")
-    return t
+    return t.translate(_ASCII_FOLD)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Descriptor words to drop (don’t change identity)
 # Keep identity adjectives like colors/cuisines separately (see KEEP_AMOD)
 # ─────────────────────────────────────────────────────────────────────────────
 # keep this line, just ensure it includes 'ground'
-STATE_ADJS = {"cooked","boiled","steamed","raw","dried","fresh","smoked","roasted","grilled","fried","baked","ground"}
+STATE_ADJS = frozenset({"cooked","boiled","steamed","raw","dried","fresh","smoked","roasted","grilled","fried","baked","ground"})
 
 # remove all of those from DROP_DESCRIPTORS (so they aren’t discarded)
-DROP_DESCRIPTORS = {
+DROP_DESCRIPTORS = frozenset({
     "dry", "powdered", "grated", "minced", "crushed",
     "sliced", "chopped", "large", "small", "medium", "boneless", "skinless",
     "uncooked", "unsalted", "salted", "sweetened",
     "unsweetened", "canned", "frozen", "ripe", "peeled", "whole",
-}
+})
 
 
 # Identity adjectives we DO keep when attached to the head (amod)
 # e.g., thai basil, spring onion, green chili, white fish, red chili
-KEEP_AMOD = {
+KEEP_AMOD = frozenset({
     "thai", "indian", "chinese", "italian",  # cuisine/nationality (expand later if needed)
     "spring",
     "green", "red", "yellow", "white", "black", "brown", "purple",
-}
+})
 # Identity adjectives that depend on the head noun
-HEAD_SPECIFIC_KEEP = {
-    "rice": {"cooked", "steamed", "boiled"},
-    "noodle": {"cooked", "boiled"},
-    "noodles": {"cooked", "boiled"},
-    "chicken": {"ground", "minced"},
-    "beef": {"ground", "minced"},
-    "pork": {"ground", "minced"},
-    "lamb": {"ground", "minced"},
-    "mutton": {"ground", "minced"},
-}
+HEAD_SPECIFIC_KEEP = MappingProxyType({
+    "rice": frozenset({"cooked", "steamed", "boiled"}),
+    "noodle": frozenset({"cooked", "boiled"}),
+    "noodles": frozenset({"cooked", "boiled"}),
+    "chicken": frozenset({"ground", "minced"}),
+    "beef": frozenset({"ground", "minced"}),
+    "pork": frozenset({"ground", "minced"}),
+    "lamb": frozenset({"ground", "minced"}),
+    "mutton": frozenset({"ground", "minced"}),
+})
 def _keep_amod_for(head_lemma: str, adj_lemma: str) -> bool:
     adj = _fold_token_spelling(adj_lemma)
     head = _fold_token_spelling(head_lemma)
@@ -117,17 +126,17 @@ def _keep_amod_for(head_lemma: str, adj_lemma: str) -> bool:
     if adj in KEEP_AMOD:
         return True
     # head-specific identity adjectives
-    return adj in HEAD_SPECIFIC_KEEP.get(head, set())
+    return adj in HEAD_SPECIFIC_KEEP.get(head, ())
 
-_PARENS_RE = re.compile(r"\s*\([^)]*\)\s*")  # remove parenthetical notes
+# One scrub pass: parenthetical notes (an unclosed "(" goes on its own),
+# underscores, and any other punctuation except hyphen/apostrophe. "(" is kept
+# out of the punctuation run so ".(note)" still drops the whole note.
+_SCRUB_RE = re.compile(r"\([^)]*\)|\(|_|[^\w\s'(-]+")
+_WS_RE = re.compile(r"\s+")
 
 def _preclean(text: str) -> str:
-    s = (text or "").strip().lower()
-    s = s.replace("_", " ")
-    s = _PARENS_RE.sub(" ", s)
-    s = re.sub(r"[^\w\s'-]+", " ", s)  # keep letters, digits, _, hyphen, apostrophe
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    s = _SCRUB_RE.sub(" ", (text or "").lower())
+    return _WS_RE.sub(" ", s).strip()
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Public: canonical_key
@@ -139,53 +148,77 @@ def _preclean(text: str) -> str:
 #   "fish sauce" → "fish sauce"   (multiword identity preserved)
 #   "basil leaf" → "basil leaf"
 # ─────────────────────────────────────────────────────────────────────────────
+@lru_cache(maxsize=8192)
 def canonical_key(name: str) -> str:
+    # pure in `name` once the pipeline choice is made; the same ingredient names
+    # recur across recipes, plans and pantry keys, so skip spaCy on repeats
     s = _preclean(name)
     if not s:
         return s
+    if _is_plain_word(s):
+        return _canon_plain_word(s)
 
     _lazy_load_spacy()
     if _NLP is not None:
-        doc = _NLP(s)
-        # Heuristic: pick the rightmost NOUN/PROPN as head; else last token
-        head = None
-        for tok in reversed(doc):
-            if tok.pos_ in ("NOUN", "PROPN"):
-                head = tok
-                break
-        head = head or doc[-1]
-
-        # Collect left modifiers that are identity-bearing
-        kept_pairs = []  # (token_index, surface)
-        for lt in head.lefts:
-            lem = _fold_token_spelling(lt.lemma_)
-            dep = lt.dep_
-            # always keep compounds (e.g., 'fish' in 'fish sauce', 'spring' in 'spring onion')
-            if dep == "compound":
-                kept_pairs.append((lt.i, lem))
-                continue
-            
-            # keep state adjectives like 'cooked', 'dried', 'ground' when used as adjectival mods
-            if dep == "amod" and _keep_amod_for(head.lemma_, lt.lemma_):
-                kept_pairs.append((lt.i, lem))
-                continue
-
-
-        kept_pairs.sort(key=lambda t: t[0])
-        left_mods = [t[1] for t in kept_pairs]
-
-        head_lemma = _fold_token_spelling(head.lemma_)
-        head_lemma = _singular_fallback(head_lemma)
-
-        parts = [p for p in left_mods if p and p not in DROP_DESCRIPTORS]
-        parts.append(head_lemma)
-        canon = " ".join(parts).strip()
-        return canon or head_lemma
-
-
-    # ── Fallback path (no spaCy) ────────────────────────────────────────────
+        return _canon_from_doc(_NLP(s))
+    return _canon_fallback(s)
+
+def _is_plain_word(s: str) -> bool:
+    """One alphabetic word with no plural ending and no droppable descriptor."""
+    return s.isalpha() and not s.endswith("s") and s not in DROP_DESCRIPTORS
+
+def _canon_plain_word(s: str) -> str:
+    """
+    Lone-word key without a spaCy parse: spelling fold + singular fold on the
+    surface form. This matches the fallback path, but deliberately NOT the
+    spaCy path, which folds head.lemma_: words whose lemma differs from the
+    surface form ("ground", "cooked", "stuffing", irregular non-"s" plurals)
+    keep their own form here. Both recipe and pantry names go through
+    canonical_key, so keys stay consistent with each other.
+    """
+    return _singular_fallback(_fold_token_spelling(s))
+
+def _canon_from_doc(doc) -> str:
+    """spaCy path: identity-bearing left modifiers + singular head lemma."""
+    # Heuristic: pick the rightmost NOUN/PROPN as head; else last token
+    head = None
+    for tok in reversed(doc):
+        if tok.pos_ in ("NOUN", "PROPN"):
+            head = tok
+            break
+    head = head or doc[-1]
+
+    # Collect left modifiers that are identity-bearing
+    kept_pairs = []  # (token_index, surface)
+    for lt in head.lefts:
+        lem = _fold_token_spelling(lt.lemma_)
+        dep = lt.dep_
+        # always keep compounds (e.g., 'fish' in 'fish sauce', 'spring' in 'spring onion')
+        if dep == "compound":
+            kept_pairs.append((lt.i, lem))
+            continue
+        
+        # keep state adjectives like 'cooked', 'dried', 'ground' when used as adjectival mods
+        if dep == "amod" and _keep_amod_for(head.lemma_, lt.lemma_):
+            kept_pairs.append((lt.i, lem))
+            continue
+
+
+    kept_pairs.sort(key=lambda t: t[0])
+    left_mods = [t[1] for t in kept_pairs]
+
+    head_lemma = _fold_token_spelling(head.lemma_)
+    head_lemma = _singular_fallback(head_lemma)
+
+    parts = [p for p in left_mods if p and p not in DROP_DESCRIPTORS]
+    parts.append(head_lemma)
+    canon = " ".join(parts).strip()
+    return canon or head_lemma
+
+# ── Fallback path (no spaCy) ────────────────────────────────────────────────
+def _canon_fallback(s: str) -> str:
     # Split, drop non-identity descriptors, keep up to a bigram (identity + head)
-    toks = [t for t in re.split(r"\s+", s) if t]
+    toks = [t for t in _WS_RE.split(s) if t]
     toks = [_fold_token_spelling(t) for t in toks if t not in DROP_DESCRIPTORS]
     if not toks:
         return ""
@@ -198,20 +231,31 @@ def canonical_key(name: str) -> str:
 
 # Convenience helpers
 def canonicalize_many(names: List[str]) -> List[str]:
-    out = []
-    for n in names or []:
-        c = canonical_key(n)
-        if c:
-            out.append(c)
-    return out
+    cleaned = [s for s in (_preclean(n) for n in names or []) if s]
+    _lazy_load_spacy()
+    if _NLP is not None:
+        # one batched pipe() call over the distinct names instead of a full
+        # pipeline run per name; repeats are mapped back from that result
+        uniq = list(dict.fromkeys(cleaned))
+        done = {s: _canon_plain_word(s) for s in uniq if _is_plain_word(s)}
+        rest = [s for s in uniq if s not in done]
+        done.update(zip(rest, map(_canon_from_doc, _NLP.pipe(rest, batch_size=64))))
+        canons = (done[s] for s in cleaned)
+    else:
+        canons = (_canon_fallback(s) for s in cleaned)
+    return [c for c in canons if c]
+
+_UNIT_FAMILY = {
+    **dict.fromkeys(("g", "gram", "grams", "gms", "kg", "kilogram", "kilograms"), "g"),
+    **dict.fromkeys(("ml", "milliliter", "milliliters", "millilitre", "millilitres",
+                     "l", "liter", "liters", "litre", "litres"), "ml"),
+}  # anything else is "count"
 
 def canonical_and_unit(item: str, unit: str) -> Tuple[str, str]:
-    """Return (canonical_name, normalized_unit('g'|'ml'|'count'))."""
-    u = (unit or "").strip().lower()
-    if u in ("g", "gram", "grams", "gms", "kg", "kilogram", "kilograms"):
-        nu = "g"
-    elif u in ("ml", "milliliter", "milliliters", "millilitre", "millilitres", "l", "liter", "liters", "litre", "litres"):
-        nu = "ml"
-    else:
-        nu = "count"
-    return canonical_key(item), nu
+    """Return (canonical_name, normalized_unit('g'|'ml'|'count')).
+
+    The name is interned: these pairs key the planner's shadow pantry and
+    requirement tuples, so equal names share one string object.
+    """
+    nu = _UNIT_FAMILY.get((unit or "").strip().lower(), "count")
+    return intern(canonical_key(item)), nu